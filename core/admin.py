@@ -1,14 +1,113 @@
 # core/admin.py
 from django.contrib import admin
-from .models import User, VendorProfile, BodabodaProfile, Category, Product, Order
+from django.contrib.admin.filters import RelatedFieldListFilter
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.html import format_html_join
+from .models import User, VendorProfile, BodabodaProfile, Category, Product, Order, ProfileSample, RiderStats, ArchivedOrder, JobRun
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from . import transitions
+from .utils import estimated_row_count, zone_for
+from .routers import replica_reads
+
+
+class ReplicaReadAdminMixin:
+    """Read changelist pages from the replica; edits and actions stay on the primary."""
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            return super().changelist_view(request, extra_context)
+        with replica_reads():
+            response = super().changelist_view(request, extra_context)
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+
+# ======================
+#  Large-table helpers
+# ======================
+EXACT_COUNT_LIMIT = 10000
+FILTER_CHOICES_LIMIT = 50
+SEARCH_MATCH_LIMIT = 500
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Avoid COUNT(*) over the whole table: count at most EXACT_COUNT_LIMIT rows,
+    and past that show unfiltered changelists the planner's row estimate
+    (from the last ANALYZE; archive_orders refreshes it) when there is one.
+    Without an estimate, paging stops at EXACT_COUNT_LIMIT rows.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        bounded = queryset.order_by().values('pk')[:EXACT_COUNT_LIMIT].count()
+        if bounded < EXACT_COUNT_LIMIT or queryset.query.where:
+            return bounded
+        estimate = estimated_row_count(queryset.model, queryset.db)
+        return max(bounded, estimate or 0)
+
+
+class BoundedRelatedFieldListFilter(RelatedFieldListFilter):
+    """Related-object filter that lists at most FILTER_CHOICES_LIMIT choices."""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin) or ('pk',)
+        related = field.remote_field.model._default_manager.order_by(*ordering)[:FILTER_CHOICES_LIMIT]
+        return [(obj.pk, str(obj)) for obj in related]
+
+
+def prefix_range(term):
+    """(lower, upper) bounds matching every string that starts with term; uses a plain B-tree index."""
+    return term, term + '\uffff'
+
+
+def normalize_phone(term):
+    if term.startswith('0'):
+        return '+255' + term[1:]
+    if term.startswith('255'):
+        return '+' + term
+    return term
+
+
+def matching_user_ids(term):
+    return User.objects.filter(
+        Q(username__range=prefix_range(term)) | Q(phone__range=prefix_range(normalize_phone(term)))
+    ).values_list('pk', flat=True)[:SEARCH_MATCH_LIMIT]
+
+
+class LargeTableAdminMixin:
+    """
+    Changelist settings for tables with hundreds of thousands of rows: estimated
+    counts, no second full-table count, a date hierarchy built from indexed
+    range probes and case-sensitive prefix search that is resolved through
+    indexed range scans instead of LIKE '%term%' over joins.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    date_hierarchy = 'created_at'
+    # Newest first straight off the created_at index (SQLite breaks ties by rowid in the index).
+    ordering = ('-created_at',)
+    change_list_template = 'admin/core/large_table_change_list.html'
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        query = self.prefix_search(term)
+        if term.isdigit():
+            query |= Q(pk=int(term))
+        return queryset.filter(query), False
 
 
 # ======================
 #  Custom User Admin
 # ======================
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(ReplicaReadAdminMixin, BaseUserAdmin):
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Additional Info', {
             'fields': ('user_type', 'phone', 'profile_image', 'latitude', 'longitude')
@@ -30,7 +129,7 @@ class UserAdmin(BaseUserAdmin):
 #  Vendor Profile Admin
 # ======================
 @admin.register(VendorProfile)
-class VendorProfileAdmin(admin.ModelAdmin):
+class VendorProfileAdmin(ReplicaReadAdminMixin, admin.ModelAdmin):
     list_display = ('business_name', 'user', 'license_number', 'location_description')
     search_fields = ('business_name', 'user__username', 'license_number')
     list_filter = ('user__user_type',)
@@ -40,17 +139,23 @@ class VendorProfileAdmin(admin.ModelAdmin):
 #  Bodaboda Profile Admin
 # ======================
 @admin.register(BodabodaProfile)
-class BodabodaProfileAdmin(admin.ModelAdmin):
+class BodabodaProfileAdmin(ReplicaReadAdminMixin, admin.ModelAdmin):
     list_display = ('plate_number', 'user', 'verified', 'is_available')
     list_filter = ('verified', 'is_available')
     search_fields = ('plate_number', 'id_number', 'user__username')
 
+    def save_model(self, request, obj, form, change):
+        if 'is_available' in form.changed_data:
+            # An admin's choice wins over expire_stale_claims' automatic switch-off.
+            obj.at_capacity = False
+        super().save_model(request, obj, form, change)
+
 
 # ======================
 #  Category Admin
 # ======================
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(ReplicaReadAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'slug')
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ('name',)
@@ -60,19 +165,24 @@ class CategoryAdmin(admin.ModelAdmin):
 #  Product Admin
 # ======================
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdminMixin, ReplicaReadAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'vendor', 'price', 'category', 'is_available', 'created_at')
-    list_filter = ('is_available', 'category', 'vendor__user_type')
-    search_fields = ('name', 'vendor__username', 'category__name')
+    list_filter = ('is_available', ('category', BoundedRelatedFieldListFilter))
+    search_fields = ('name', 'vendor__username')
+    search_help_text = 'Product name, vendor username or phone prefix (case-sensitive), or product ID'
     list_select_related = ('vendor', 'category')
+    raw_id_fields = ('vendor',)
     readonly_fields = ('created_at',)
 
+    def prefix_search(self, term):
+        return Q(name__range=prefix_range(term)) | Q(vendor_id__in=matching_user_ids(term))
+
 
 # ======================
 #  Order Admin
 # ======================
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdminMixin, ReplicaReadAdminMixin, admin.ModelAdmin):
     list_display = (
         'id',
         'customer',
@@ -91,9 +201,6 @@ class OrderAdmin(admin.ModelAdmin):
     list_filter = (
         'status',
         'is_delivered',
-        'created_at',
-        'claimed_at',
-        'delivered_at',
     )
     search_fields = (
         'customer__username',
@@ -101,8 +208,10 @@ class OrderAdmin(admin.ModelAdmin):
         'claimed_by__username',
         'product__name',
     )
+    search_help_text = 'Order ID, or customer/rider username or phone prefix, or product name prefix (case-sensitive)'
     list_select_related = ('customer', 'product', 'bodaboda', 'claimed_by')
-    readonly_fields = ('created_at', 'claimed_at', 'delivered_at')
+    raw_id_fields = ('customer', 'product', 'bodaboda', 'claimed_by')
+    readonly_fields = ('zone', 'created_at', 'claimed_at', 'delivered_at')
 
     fieldsets = (
         ('Order Info', {
@@ -112,6 +221,7 @@ class OrderAdmin(admin.ModelAdmin):
                 'quantity',
                 'total_price',
                 'status',
+                'zone',
             )
         }),
         ('Delivery Details', {
@@ -132,18 +242,130 @@ class OrderAdmin(admin.ModelAdmin):
         }),
     )
 
+    def prefix_search(self, term):
+        user_ids = matching_user_ids(term)
+        product_ids = Product.objects.filter(name__range=prefix_range(term)).values_list('pk', flat=True)
+        return (
+            Q(customer_id__in=user_ids) |
+            Q(claimed_by_id__in=user_ids) |
+            Q(bodaboda_id__in=user_ids) |
+            Q(product_id__in=product_ids[:SEARCH_MATCH_LIMIT])
+        )
+
     # Optional: Auto-fill claim or delivery timestamps (admin save logic)
     def save_model(self, request, obj, form, change):
+        from django.utils import timezone
+
+        previous = Order.objects.select_related('product').get(pk=obj.pk) if change else None
+
         # Automatically set claimed_at when claimed_by changes
         if 'claimed_by' in form.changed_data and obj.claimed_by and not obj.claimed_at:
-            from django.utils import timezone
             obj.claimed_at = timezone.now()
 
         # Automatically mark as delivered if status is 'delivered'
         if obj.status == 'delivered':
             obj.is_delivered = True
             if not obj.delivered_at:
-                from django.utils import timezone
                 obj.delivered_at = timezone.now()
 
+        if not change:
+            obj.zone = zone_for(obj.customer.latitude, obj.customer.longitude)
+            obj.take_snapshot()
+
         super().save_model(request, obj, form, change)
+
+        # Log the edit and keep counters, sales rollups and rider stats in step
+        # with manual fixes. The admin already wraps the save in a transaction,
+        # so they all land together.
+        transitions.order_changed(previous, obj, actor=request.user)
+
+    def delete_model(self, request, obj):
+        transitions.order_deleted(obj, actor=request.user)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for order in queryset.only('id', 'status', 'zone', 'created_at'):
+            transitions.order_deleted(order, actor=request.user)
+        super().delete_queryset(request, queryset)
+
+
+# ======================
+#  Archived Order Admin
+# ======================
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(ReplicaReadAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'customer', 'product_name', 'quantity', 'total_price', 'status', 'claimed_by',
+                    'created_at', 'delivered_at', 'archived_at')
+    list_filter = ('status',)
+    list_select_related = ('customer', 'claimed_by')
+    raw_id_fields = ('customer', 'product', 'bodaboda', 'claimed_by')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-created_at',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# ======================
+#  Rider Stats Admin
+# ======================
+@admin.register(RiderStats)
+class RiderStatsAdmin(ReplicaReadAdminMixin, admin.ModelAdmin):
+    list_display = ('rider', 'deliveries', 'average_rating', 'rating_count', 'average_delivery_minutes',
+                    'on_time_rate', 'claims')
+    list_select_related = ('rider',)
+    ordering = ('-deliveries',)
+    raw_id_fields = ('rider',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# ======================
+#  Profile Sample Admin
+# ======================
+@admin.register(ProfileSample)
+class ProfileSampleAdmin(admin.ModelAdmin):
+    list_display = ('endpoint', 'duration_ms', 'trigger', 'path', 'created_at')
+    list_filter = ('endpoint', 'trigger')
+    readonly_fields = ('endpoint', 'path', 'trigger', 'duration_ms', 'created_at', 'function_table')
+    exclude = ('top_functions',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description='Top functions (cumulative)')
+    def function_table(self, obj):
+        return format_html_join(
+            '\n', '<div><code>{:>10} ms {:>10} ms {:>7}  {}</code></div>',
+            (
+                (row['cumtime_ms'], row['tottime_ms'], row['calls'], row['function'])
+                for row in obj.top_functions
+            )
+        )
+
+
+# ======================
+#  Job Run Admin
+# ======================
+@admin.register(JobRun)
+class JobRunAdmin(admin.ModelAdmin):
+    list_display = ('job', 'started_at', 'duration_ms', 'stats')
+    list_filter = ('job',)
+    readonly_fields = ('job', 'started_at', 'duration_ms', 'stats')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
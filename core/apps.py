@@ -1,6 +1,25 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+def install_query_metrics(sender, connection, **kwargs):
+    from .metrics import record_query
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, pre_delete, pre_save
+        from .models import Category, Product, User, VendorProfile
+        from .sync import record_tombstone, touch_category_products, touch_vendor_products
+
+        connection_created.connect(install_query_metrics)
+        post_delete.connect(record_tombstone, sender=Product)
+        post_delete.connect(record_tombstone, sender=Category)
+        pre_delete.connect(touch_category_products, sender=Category)
+        pre_save.connect(touch_vendor_products, sender=VendorProfile)
+        pre_save.connect(touch_vendor_products, sender=User)
@@ -0,0 +1,33 @@
+# core/archive.py
+"""
+Hot/cold split for orders: finished orders move from Order to ArchivedOrder
+so the live table and its indexes only hold recent and in-flight work.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import transitions
+from .models import ArchivedOrder, Order
+
+ARCHIVABLE_STATUSES = ('delivered', 'cancelled')
+
+
+def archivable(days):
+    cutoff = timezone.now() - timedelta(days=days)
+    return Order.objects.filter(status__in=ARCHIVABLE_STATUSES, created_at__lt=cutoff)
+
+
+def archive_batch(days, batch_size):
+    """Move up to batch_size archivable orders in one transaction; returns how many moved."""
+    with transaction.atomic():
+        orders = list(
+            archivable(days).select_related('product').order_by('created_at', 'id')[:batch_size]
+        )
+        if not orders:
+            return 0
+        ArchivedOrder.objects.bulk_create([ArchivedOrder.from_order(order) for order in orders])
+        transitions.orders_archived(orders)
+        Order.objects.filter(id__in=[order.id for order in orders]).delete()
+    return len(orders)
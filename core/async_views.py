@@ -0,0 +1,134 @@
+# core/async_views.py
+"""
+Native async versions of the rider hot paths.
+
+DRF views are sync-only, so under ASGI every rider ping holds a worker thread
+for the whole request. These views authenticate the JWT themselves and use the
+async ORM, so they can be served directly on the event loop.
+"""
+import json
+from functools import wraps
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import BodabodaDevice, Order, User
+from . import dispatch, transitions
+from .idempotency import aidempotent
+from .serializers import OrderSerializer, sparse_queryset
+from .utils import valid_coordinates
+
+_jwt = JWTAuthentication()
+
+
+async def aauthenticate(request):
+    """Return the active user behind the request's Bearer token, or None."""
+    header = _jwt.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = _jwt.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = _jwt.get_validated_token(raw_token)
+        user = await User.objects.aget(**{api_settings.USER_ID_FIELD: token[api_settings.USER_ID_CLAIM]})
+    except (AuthenticationFailed, KeyError, User.DoesNotExist):
+        return None
+    return user if user.is_active else None
+
+
+def rider_view(method):
+    """Async counterpart of @api_view + IsAuthenticated + the bodaboda check."""
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != method:
+                return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+            user = await aauthenticate(request)
+            if user is None:
+                return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+            if user.user_type != 'bodaboda':
+                return JsonResponse({"error": "Only bodabodas"}, status=403)
+            request.user = user
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _payload(request):
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+    return request.POST
+
+
+@rider_view('POST')
+async def update_location(request):
+    data = _payload(request)
+    try:
+        lat = float(data['latitude'])
+        lng = float(data['longitude'])
+    except KeyError:
+        return JsonResponse({"error": "latitude and longitude are required"}, status=400)
+    except (ValueError, TypeError):
+        return JsonResponse({"error": "Invalid coordinates"}, status=400)
+    if not valid_coordinates(lat, lng):
+        return JsonResponse({"error": "Invalid coordinates"}, status=400)
+
+    zone, partition = dispatch.locate(lat, lng)
+    await User.objects.filter(pk=request.user.pk).aupdate(
+        latitude=lat, longitude=lng, zone=zone, dispatch_partition=partition
+    )
+    return JsonResponse({"status": "Location updated"})
+
+
+@rider_view('GET')
+async def nearby_orders(request):
+    partition = request.user.dispatch_partition
+    routed = await dispatch.aroute_to_owner(request, partition)
+    if routed is not None:
+        return routed
+    orders = [
+        order async for order in sparse_queryset(Order.objects.filter(
+            dispatch_partition=partition,
+            status='pending',
+            claimed_by__isnull=True
+        ), OrderSerializer, request)
+    ]
+    serializer = OrderSerializer(orders, many=True, context={'request': request})
+    return JsonResponse(serializer.data, safe=False)
+
+
+@rider_view('POST')
+@aidempotent
+async def claim_order(request, order_id):
+    # The conditional UPDATE and its event/counter writes share one transaction,
+    # which the async ORM can't open, so the whole claim runs in a worker thread.
+    partition = await Order.objects.filter(id=order_id).values_list('dispatch_partition', flat=True).afirst()
+    if partition is None:
+        return JsonResponse({"detail": "No Order matches the given query."}, status=404)
+    routed = await dispatch.aroute_to_owner(request, partition)
+    if routed is not None:
+        return routed
+    if not await transitions.aclaim(order_id, request.user):
+        return JsonResponse({"error": "Order already claimed"}, status=409)
+    return JsonResponse({"status": "Order claimed successfully"})
+
+
+@rider_view('POST')
+async def save_device_token(request):
+    token = _payload(request).get('expo_token')
+    if not token:
+        return JsonResponse({"error": "expo_token required"}, status=400)
+
+    await BodabodaDevice.objects.aupdate_or_create(
+        expo_token=token,
+        defaults={'user': request.user, 'is_active': True}
+    )
+    return JsonResponse({"status": "Token saved"})
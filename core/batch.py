@@ -0,0 +1,93 @@
+# core/batch.py
+"""
+Request multiplexing: run several internal GET requests in one round trip.
+Sub-requests go through the URL resolver in-process and reuse the outer
+request's authentication, so the JWT is validated once for the whole batch.
+"""
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.exception import response_for_exception
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+BATCH_PREFIX = '/api/'
+
+_executor = None
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(settings.BATCH_MAX_WORKERS, thread_name_prefix='batch')
+    return _executor
+
+
+def sub_request(request, path, query):
+    """A GET request for `path` carrying the outer request's headers and resolved user."""
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = path
+    sub.META = {**request.META, 'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query}
+    sub.GET = QueryDict(query)
+    sub.user = request.user
+    # DRF picks these up in Request.__init__ and skips its authenticators.
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def dispatch(request, path):
+    """Run one sub-request; returns (status, body)."""
+    parts = urlsplit(path)
+    if not parts.path.startswith(BATCH_PREFIX) or parts.path == request.path:
+        return 400, {"error": f"path must be an API path under {BATCH_PREFIX}"}
+    sub = sub_request(request, parts.path, parts.query)
+    try:
+        match = resolve(parts.path)
+    except Resolver404:
+        return 404, {"detail": "Not found."}
+    sub.resolver_match = match
+
+    view = match.func
+    if iscoroutinefunction(view):
+        view = async_to_sync(view)
+    try:
+        response = view(sub, *match.args, **match.kwargs)
+    except Exception as exc:
+        response = response_for_exception(sub, exc)
+    if response.streaming:
+        # Exports and the like are not worth buffering into a batch; fetch them directly.
+        response.close()
+        return 501, {"error": "streaming responses cannot be batched; request this path on its own"}
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+
+    if response.get('Content-Type', '').startswith('application/json'):
+        return response.status_code, json.loads(response.content or b'null')
+    return response.status_code, response.content.decode(response.charset or 'utf-8')
+
+
+def _dispatch_in_thread(request, path):
+    try:
+        return dispatch(request, path)
+    finally:
+        connections.close_all()
+
+
+def run_batch(request, paths, parallel=False):
+    """Dispatch every path, concurrently when asked; results come back in request order."""
+    if not parallel or len(paths) < 2:
+        return [dispatch(request, path) for path in paths]
+    # Each task runs in a copy of this context so sub-request DB time still
+    # lands in the batch's Server-Timing spans.
+    futures = [
+        _pool().submit(contextvars.copy_context().run, _dispatch_in_thread, request, path)
+        for path in paths
+    ]
+    return [future.result() for future in futures]
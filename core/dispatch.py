@@ -0,0 +1,127 @@
+# core/dispatch.py
+"""
+Zone-partitioned dispatch.
+
+Orders and riders carry the grid-cell zone of their location (utils.zone_for).
+Zones are grouped into square blocks of DISPATCH_BLOCK_CELLS cells, so a
+neighbourhood stays on one partition, and each block hashes to one of the
+partitions. Partition i is served by DISPATCH_NODES[i]: rider reads and claims
+for a partition another node owns are answered with a 307 to that node (or,
+with DISPATCH_FORWARD, proxied to it), so each partition has a single writer.
+With no nodes configured there is one partition and everything is served
+locally.
+"""
+import threading
+import zlib
+from collections import defaultdict
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.http.response import HttpResponseRedirectBase
+
+from .models import Order, User
+from .utils import zone_for
+
+
+def partition_count():
+    return max(len(settings.DISPATCH_NODES), 1)
+
+
+def partition_for(zone):
+    """The partition owning a zone ("row:col"); unknown zones go to partition 0."""
+    count = partition_count()
+    if not zone or count == 1:
+        return 0
+    row, col = (int(part) for part in zone.split(':'))
+    block = settings.DISPATCH_BLOCK_CELLS
+    # crc32 rather than hash(): every process must agree on the owner.
+    return zlib.crc32(b'%d:%d' % (row // block, col // block)) % count
+
+
+def locate(lat, lng):
+    """(zone, partition) for a coordinate."""
+    zone = zone_for(lat, lng)
+    return zone, partition_for(zone)
+
+
+def is_local(partition):
+    return partition_count() == 1 or partition == settings.DISPATCH_PARTITION
+
+
+class PartitionRedirect(HttpResponseRedirectBase):
+    # 307 keeps the method and body, so a redirected claim is still a POST.
+    status_code = 307
+
+
+FORWARDED_HEADER = 'X-Dispatch-Forwarded'
+_FORWARDED_HEADERS = ('Authorization', 'Content-Type', 'Accept')
+_local = threading.local()
+
+
+def _forward(request, url, partition):
+    if request.headers.get(FORWARDED_HEADER):
+        # The sender thinks we own this partition and we disagree: the nodes'
+        # settings have drifted, so fail instead of bouncing the request around.
+        return JsonResponse({"error": "Partition owner mismatch"}, status=421)
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+    headers = {name: request.headers[name] for name in _FORWARDED_HEADERS if name in request.headers}
+    headers[FORWARDED_HEADER] = '1'
+    try:
+        upstream = session.request(
+            request.method, url, data=request.body, headers=headers, timeout=settings.DISPATCH_FORWARD_TIMEOUT
+        )
+    except requests.RequestException:
+        return JsonResponse({"error": "Partition owner unreachable"}, status=502)
+    response = HttpResponse(upstream.content, status=upstream.status_code,
+                            content_type=upstream.headers.get('Content-Type'))
+    response['X-Dispatch-Partition'] = str(partition)
+    return response
+
+
+def route_to_owner(request, partition):
+    """
+    The response for a request that belongs to another node's partition (a
+    redirect, or the owner's own response with DISPATCH_FORWARD), or None
+    when this node owns it.
+    """
+    if partition is None or is_local(partition):
+        return None
+    url = settings.DISPATCH_NODES[partition].rstrip('/') + request.get_full_path()
+    if settings.DISPATCH_FORWARD:
+        return _forward(request, url, partition)
+    response = PartitionRedirect(url)
+    response['X-Dispatch-Partition'] = str(partition)
+    return response
+
+
+async def aroute_to_owner(request, partition):
+    if partition is None or is_local(partition):
+        return None
+    return await sync_to_async(route_to_owner, thread_sensitive=False)(request, partition)
+
+
+def repartition():
+    """
+    Reassign order and rider partitions after DISPATCH_NODES or
+    DISPATCH_BLOCK_CELLS change (or a bulk load); returns (zones, riders).
+    Every node must be restarted with the same settings before this runs.
+    """
+    zones = list(Order.objects.values_list('zone', flat=True).distinct().order_by())
+    riders = defaultdict(list)
+    for rider_id, lat, lng in User.objects.filter(user_type='bodaboda').values_list('id', 'latitude', 'longitude'):
+        riders[locate(lat, lng)].append(rider_id)
+
+    with transaction.atomic():
+        for zone in zones:
+            Order.objects.filter(zone=zone).update(dispatch_partition=partition_for(zone))
+        for (zone, partition), rider_ids in riders.items():
+            for start in range(0, len(rider_ids), 500):
+                User.objects.filter(id__in=rider_ids[start:start + 500]).update(
+                    zone=zone, dispatch_partition=partition
+                )
+    return len(zones), sum(len(rider_ids) for rider_ids in riders.values())
@@ -0,0 +1,167 @@
+# core/eta.py
+"""
+Delivery ETAs from the rider's last reported position.
+
+Travel speed comes from SpeedProfile: the effective km/h per (zone, local hour)
+of delivered orders, measured as the vendor-to-customer distance over the
+claim-to-delivery time, so the usual wait at the vendor is priced in.
+Estimates are computed between ETA_CELL_DEGREES cell centres and kept in the
+'eta' cache (an LRU with a TTL), so every poll from the same cells shares one
+entry and one SpeedProfile read.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
+
+from .models import ArchivedOrder, Order, SpeedProfile, VendorProfile
+from .utils import grid_cell, haversine_distance
+
+
+def _route_km(a, b):
+    return haversine_distance(a[0], a[1], b[0], b[1]) * settings.ETA_ROUTE_FACTOR
+
+
+def _sample(shop, customer_lat, customer_lng, claimed_at, delivered_at):
+    """(km, seconds) for one delivery, or None when it cannot teach a speed."""
+    if shop is None or customer_lat is None or customer_lng is None or not (claimed_at and delivered_at):
+        return None
+    seconds = (delivered_at - claimed_at).total_seconds()
+    if not settings.ETA_MIN_SAMPLE_SECONDS <= seconds <= settings.ETA_MAX_SAMPLE_SECONDS:
+        return None
+    return _route_km(shop, (customer_lat, customer_lng)), seconds
+
+
+def shop_location(vendor_id):
+    """(lat, lng) of the vendor's pinned shop, or None."""
+    if not vendor_id:
+        return None
+    return VendorProfile.objects.filter(user_id=vendor_id, latitude__isnull=False).values_list(
+        'latitude', 'longitude'
+    ).first()
+
+
+def _apply(zone, hour, **changes):
+    if SpeedProfile.objects.filter(zone=zone, hour=hour).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            SpeedProfile.objects.create(zone=zone, hour=hour)
+    except IntegrityError:
+        pass
+    SpeedProfile.objects.filter(zone=zone, hour=hour).update(**changes)
+
+
+def record_delivery(order, sign=1):
+    """Learn from a delivered order (its zone and the town-wide row); sign=-1 takes it back out."""
+    sample = _sample(
+        shop_location(order.vendor_id),
+        order.customer_latitude, order.customer_longitude, order.claimed_at, order.delivered_at
+    )
+    if sample is None:
+        return
+    km, seconds = sample
+    hour = timezone.localtime(order.claimed_at).hour
+    total_km = F('total_km') + sign * km
+    total_seconds = F('total_seconds') + sign * seconds
+    for zone in {order.zone, ''}:
+        _apply(
+            zone, hour,
+            deliveries=F('deliveries') + sign,
+            total_km=total_km,
+            total_seconds=total_seconds,
+            speed_kmh=Cast(total_km, FloatField()) * 3600 / NullIf(total_seconds, 0.0),
+        )
+
+
+def rebuild():
+    """Relearn every profile from live and archived deliveries; returns the number of profiles written."""
+    shops = {
+        user_id: (lat, lng)
+        for user_id, lat, lng in VendorProfile.objects.filter(latitude__isnull=False).values_list(
+            'user_id', 'latitude', 'longitude'
+        )
+    }
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    for model in (Order, ArchivedOrder):
+        delivered = model.objects.filter(status='delivered', claimed_at__isnull=False).values_list(
+            'zone', 'vendor_id', 'customer_latitude', 'customer_longitude', 'claimed_at', 'delivered_at'
+        )
+        for zone, vendor_id, lat, lng, claimed_at, delivered_at in delivered.iterator(chunk_size=5000):
+            sample = _sample(shops.get(vendor_id), lat, lng, claimed_at, delivered_at)
+            if sample is None:
+                continue
+            hour = timezone.localtime(claimed_at).hour
+            for key in {(zone, hour), ('', hour)}:
+                total = totals[key]
+                total[0] += 1
+                total[1] += sample[0]
+                total[2] += sample[1]
+
+    rows = [
+        SpeedProfile(
+            zone=zone, hour=hour, deliveries=count, total_km=km, total_seconds=seconds,
+            speed_kmh=km * 3600 / seconds if seconds else None,
+        )
+        for (zone, hour), (count, km, seconds) in totals.items()
+    ]
+    with transaction.atomic():
+        SpeedProfile.objects.all().delete()
+        SpeedProfile.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def speed_for(zone, hour):
+    """(km/h, source) for a zone and hour: the zone's own profile, else the town's, else the default."""
+    profiles = dict(
+        SpeedProfile.objects.filter(
+            zone__in={zone, ''}, hour=hour, deliveries__gte=settings.ETA_MIN_SAMPLES, speed_kmh__gt=0
+        ).values_list('zone', 'speed_kmh')
+    )
+    if zone and zone in profiles:
+        return profiles[zone], 'zone'
+    if '' in profiles:
+        return profiles[''], 'town'
+    return settings.ETA_DEFAULT_SPEED_KMH, 'default'
+
+
+def _centre(cell):
+    size = settings.ETA_CELL_DEGREES
+    return (cell[0] + 0.5) * size, (cell[1] + 0.5) * size
+
+
+def estimate(order, rider_location, shop=None, now=None):
+    """
+    {'seconds', 'distance_km', 'speed_kmh', 'source'} for a rider at
+    rider_location (lat, lng) to reach the customer, via the vendor's shop
+    when the order has not been picked up yet. None if a location is unknown.
+    """
+    customer = (order.customer_latitude, order.customer_longitude)
+    if None in rider_location or None in customer:
+        return None
+    size = settings.ETA_CELL_DEGREES
+    cells = [grid_cell(*rider_location, size=size)]
+    if shop is not None and order.status == 'assigned':
+        cells.append(grid_cell(*shop, size=size))
+    cells.append(grid_cell(*customer, size=size))
+    hour = timezone.localtime(now).hour
+
+    cache = caches['eta']
+    key = 'eta:%s:%d:%s' % (order.zone, hour, '/'.join('%d,%d' % cell for cell in cells))
+    found = cache.get(key)
+    if found is None:
+        points = [_centre(cell) for cell in cells]
+        distance = sum(_route_km(a, b) for a, b in zip(points, points[1:]))
+        speed, source = speed_for(order.zone, hour)
+        found = {
+            'seconds': round(distance / speed * 3600),
+            'distance_km': round(distance, 2),
+            'speed_kmh': round(speed, 1),
+            'source': source,
+        }
+        cache.set(key, found, settings.ETA_CACHE_SECONDS)
+    return found
@@ -0,0 +1,69 @@
+# core/expiry.py
+"""
+Claims that are never picked up go back to the pool, and rider availability
+is recomputed from what riders actually carry. Run by expire_stale_claims.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import transitions
+from .models import BodabodaProfile, Order
+
+IN_FLIGHT_STATUSES = ('assigned', 'picked_up')
+
+
+def stale_claims(minutes, now=None):
+    """Orders claimed more than `minutes` ago and still not picked up (the (status, claimed_at) index)."""
+    cutoff = (now or timezone.now()) - timedelta(minutes=minutes)
+    return Order.objects.filter(status='assigned', claimed_at__lt=cutoff)
+
+
+def expire_batch(minutes, batch_size, now=None):
+    """Release up to batch_size stale claims back to pending in one transaction; returns the released orders."""
+    with transaction.atomic():
+        stale = stale_claims(minutes, now)
+        orders = list(
+            stale.select_for_update(skip_locked=True)
+            .only('id', 'status', 'zone', 'created_at', 'claimed_at', 'claimed_by_id')
+            .order_by('claimed_at', 'id')[:batch_size]
+        )
+        if not orders:
+            return []
+        ids = [order.id for order in orders]
+        # Conditional, so a rider who picks the order up meanwhile keeps it.
+        released = stale.filter(id__in=ids).update(status='pending', claimed_by=None, claimed_at=None)
+        if released != len(orders):
+            still_pending = set(
+                Order.objects.filter(id__in=ids, status='pending', claimed_by__isnull=True)
+                .values_list('id', flat=True)
+            )
+            orders = [order for order in orders if order.id in still_pending]
+        transitions.claims_expired(orders)
+    return orders
+
+
+def reconcile_availability(max_active):
+    """
+    Mark riders carrying max_active or more in-flight orders unavailable, and
+    make the riders this job switched off earlier available again once they
+    are below it; returns (made busy, made available). Riders switched off
+    by hand are left alone.
+    """
+    busy = (
+        Order.objects.filter(status__in=IN_FLIGHT_STATUSES, claimed_by__isnull=False)
+        .values('claimed_by_id')
+        .annotate(active=Count('id'))
+        .filter(active__gte=max_active)
+        .values('claimed_by_id')
+    )
+    with transaction.atomic():
+        made_busy = BodabodaProfile.objects.filter(is_available=True, user_id__in=busy).update(
+            is_available=False, at_capacity=True
+        )
+        made_free = BodabodaProfile.objects.filter(at_capacity=True).exclude(user_id__in=busy).update(
+            is_available=True, at_capacity=False
+        )
+    return made_busy, made_free
@@ -0,0 +1,119 @@
+# core/exports.py
+"""Constant-memory order exports shared by the ops endpoint and `export_orders`."""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import ArchivedOrder, Order
+from .routers import read_alias
+
+EXPORT_COLUMNS = [
+    'id', 'created_at', 'status', 'quantity', 'total_price', 'delivery_address',
+    'customer_id', 'customer_username', 'customer_phone',
+    'product_id', 'product_name',
+    'vendor_id', 'vendor_username',
+    'rider_id', 'rider_username', 'rider_phone',
+    'claimed_at', 'delivered_at',
+]
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+
+def export_queryset(first_day=None, last_day=None, statuses=None, model=Order):
+    """Orders created between first_day and last_day inclusive; None means unbounded."""
+    queryset = model.objects.all()
+    if first_day:
+        queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(first_day, time.min)))
+    if last_day:
+        next_day = datetime.combine(last_day + timedelta(days=1), time.min)
+        queryset = queryset.filter(created_at__lt=timezone.make_aware(next_day))
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset
+
+
+def export_querysets(first_day=None, last_day=None, statuses=None):
+    """The live orders matching the filters, then the archived ones (see archive_orders)."""
+    return [export_queryset(first_day, last_day, statuses, model) for model in (Order, ArchivedOrder)]
+
+
+def iter_orders(queryset, chunk_size=2000):
+    """
+    Walk the queryset in primary-key order one keyset page at a time, so each
+    query is an index range scan and memory stays flat however many rows match.
+    """
+    queryset = queryset.select_related('customer', 'vendor', 'claimed_by').only(
+        'id', 'created_at', 'status', 'quantity', 'total_price', 'delivery_address', 'claimed_at', 'delivered_at',
+        'product_id', 'product_name',
+        'customer__username', 'customer__phone',
+        'vendor__username',
+        'claimed_by__username', 'claimed_by__phone',
+    ).order_by('pk')
+    last_pk = 0
+    while True:
+        seen = 0
+        for order in queryset.filter(pk__gt=last_pk)[:chunk_size].iterator(chunk_size=chunk_size):
+            seen += 1
+            last_pk = order.pk
+            yield order
+        if seen < chunk_size:
+            return
+
+
+def order_row(order):
+    # Product and vendor come from the order's snapshot, as they were when it was placed.
+    customer, vendor, rider = order.customer, order.vendor, order.claimed_by
+    return {
+        'id': order.id,
+        'created_at': order.created_at,
+        'status': order.status,
+        'quantity': order.quantity,
+        'total_price': order.total_price,
+        'delivery_address': order.delivery_address,
+        'customer_id': customer.id,
+        'customer_username': customer.username,
+        'customer_phone': customer.phone,
+        'product_id': order.product_id,
+        'product_name': order.product_name,
+        'vendor_id': order.vendor_id,
+        'vendor_username': vendor.username if vendor else None,
+        'rider_id': rider.id if rider else None,
+        'rider_username': rider.username if rider else None,
+        'rider_phone': rider.phone if rider else None,
+        'claimed_at': order.claimed_at,
+        'delivered_at': order.delivered_at,
+    }
+
+
+class _Echo:
+    """File-like object whose write() hands the CSV line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_export(querysets, export_format='csv', chunk_size=2000):
+    """
+    Yield the export of each queryset in turn (see export_querysets), line by
+    line. The database is picked now, the replica when it is fresh, and kept for
+    the whole stream however long the client takes to read it.
+    """
+    querysets = [queryset.using(read_alias(queryset.model)) for queryset in querysets]
+    return _export_lines(querysets, export_format, chunk_size)
+
+
+def _export_lines(querysets, export_format, chunk_size):
+    orders = (order for queryset in querysets for order in iter_orders(queryset, chunk_size))
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_COLUMNS)
+        for order in orders:
+            row = order_row(order)
+            yield writer.writerow([
+                '' if row[column] is None else row[column] for column in EXPORT_COLUMNS
+            ])
+    else:
+        for order in orders:
+            yield json.dumps(order_row(order), cls=DjangoJSONEncoder) + '\n'
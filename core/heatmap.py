@@ -0,0 +1,84 @@
+# core/heatmap.py
+"""
+Order demand heatmap over the ZONE_CELL_DEGREES grid.
+
+Each cell keeps an exponentially decayed order count (half-life
+DEMAND_HALF_LIFE_MINUTES). A new order decays the stored score to now and adds
+one in a single UPDATE, so writes never re-aggregate and reads only touch the
+cells inside the requested viewport.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Power
+from django.utils import timezone
+
+from .models import DemandCell, Order
+from .utils import grid_cell
+
+
+def _half_life_seconds():
+    return settings.DEMAND_HALF_LIFE_MINUTES * 60
+
+
+def decayed(score, stamp, now):
+    """`score` recorded at `stamp`, decayed to `now` (both Unix seconds)."""
+    return score * 0.5 ** (max(now - stamp, 0) / _half_life_seconds())
+
+
+def record_demand(lat, lng, at=None):
+    """Count one order placed at (lat, lng) into its cell."""
+    row, col = grid_cell(lat, lng)
+    if row is None:
+        return
+    now = (at or timezone.now()).timestamp()
+    cells = DemandCell.objects.filter(cell_row=row, cell_col=col)
+    decay = Power(Value(0.5), (Value(now) - F('stamp')) / _half_life_seconds(), output_field=FloatField())
+    if cells.update(score=F('score') * decay + 1, stamp=now):
+        return
+    try:
+        with transaction.atomic():
+            DemandCell.objects.create(cell_row=row, cell_col=col, stamp=now)
+    except IntegrityError:
+        pass
+    cells.update(score=F('score') * decay + 1, stamp=now)
+
+
+def viewport(min_row, max_row, min_col, max_col, now=None):
+    """[(row, col, score now), ...] for the cells in the box with a visible score."""
+    now = (now or timezone.now()).timestamp()
+    cells = DemandCell.objects.filter(
+        cell_row__range=(min_row, max_row), cell_col__range=(min_col, max_col)
+    ).values_list('cell_row', 'cell_col', 'score', 'stamp').order_by('cell_row', 'cell_col')
+    found = []
+    for row, col, score, stamp in cells:
+        score = decayed(score, stamp, now)
+        if score >= settings.DEMAND_MIN_SCORE:
+            found.append((row, col, score))
+    return found
+
+
+def rebuild(window_half_lives=10):
+    """
+    Recompute every cell from the orders placed in the last few half-lives
+    (older orders weigh under 0.1%); returns the number of cells written.
+    """
+    now = timezone.now()
+    since = now - timedelta(seconds=_half_life_seconds() * window_half_lives)
+    scores = {}
+    orders = Order.objects.filter(created_at__gte=since, customer_latitude__isnull=False).values_list(
+        'customer_latitude', 'customer_longitude', 'created_at'
+    )
+    for lat, lng, created_at in orders.iterator():
+        cell = grid_cell(lat, lng)
+        if cell[0] is not None:
+            scores[cell] = scores.get(cell, 0.0) + decayed(1.0, created_at.timestamp(), now.timestamp())
+    with transaction.atomic():
+        DemandCell.objects.all().delete()
+        DemandCell.objects.bulk_create([
+            DemandCell(cell_row=row, cell_col=col, score=score, stamp=now.timestamp())
+            for (row, col), score in scores.items()
+        ])
+    return len(scores)
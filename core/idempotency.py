@@ -0,0 +1,159 @@
+# core/idempotency.py
+"""
+Idempotency-Key support for the writes clients retry on flaky networks.
+
+The first request with a given (user, key) inserts a placeholder row, runs
+the view and stores its status and JSON body; retries get that response
+replayed (marked Idempotent-Replayed) without running the view again, so no
+second order, claim or push. The placeholder only lives
+IDEMPOTENCY_LOCK_SECONDS, so a request that died half way does not block the
+key; a stored response lives IDEMPOTENCY_TTL_SECONDS. Responses that did not
+settle anything (5xx, or a request handed to another dispatch node) are not
+stored, and the key can be retried.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .dispatch import FORWARDED_HEADER
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+def _fingerprint(request):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(request.method.encode())
+    digest.update(request.get_full_path().encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _begin(user_id, key, fingerprint, forwarded=False):
+    """
+    None if this request now owns the key, else the error or replay to answer
+    with as (status, body, replayed). A request another dispatch node proxied
+    here takes over that node's placeholder: only the key's owner forwards.
+    """
+    now = timezone.now()
+    keys = IdempotencyKey.objects.filter(user_id=user_id, key=key)
+    for _ in range(2):
+        # Look first: a retry is answered by this one read.
+        found = keys.only('fingerprint', 'status_code', 'body', 'expires_at').first()
+        if found is not None and found.expires_at > now:
+            if found.fingerprint != fingerprint:
+                return 422, {"error": f"{HEADER} was already used for a different request"}, False
+            if found.status_code is not None:
+                return found.status_code, found.body, True
+            if forwarded:
+                return None
+            break
+        if found is not None:
+            keys.filter(expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    user_id=user_id, key=key, fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+                )
+            return None
+        except IntegrityError:
+            pass  # a concurrent first request got in first; look again
+    return 409, {"error": f"A request with this {HEADER} is still in progress"}, False
+
+
+def _release(user_id, key):
+    IdempotencyKey.objects.filter(user_id=user_id, key=key, status_code__isnull=True).delete()
+
+
+def _finish(user_id, key, response):
+    """Store the response for replay, or free the key when there is nothing worth replaying."""
+    routed = response.has_header('X-Dispatch-Partition') or response.status_code == 421
+    if response.status_code >= 500 or routed or not isinstance(response, (Response, JsonResponse)):
+        # A routed response was (or will be) answered and stored by the owning node.
+        _release(user_id, key)
+        return
+    IdempotencyKey.objects.filter(user_id=user_id, key=key, status_code__isnull=True).update(
+        status_code=response.status_code,
+        body=response.data if isinstance(response, Response) else json.loads(response.content),
+        expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+    )
+
+
+def _key(request):
+    """(key, error body): the request's key, if any, and whether it is usable."""
+    key = request.headers.get(HEADER)
+    if not key or not request.user.is_authenticated:
+        return None, None
+    if len(key) > MAX_KEY_LENGTH:
+        return None, {"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"}
+    return key, None
+
+
+def idempotent(view):
+    """Honour Idempotency-Key on a DRF view (apply below @api_view, or with method_decorator)."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key, error = _key(request)
+        if error:
+            return Response(error, status=400)
+        if key is None:
+            return view(request, *args, **kwargs)
+        answer = _begin(request.user.id, key, _fingerprint(request), FORWARDED_HEADER in request.headers)
+        if answer is not None:
+            status, body, replayed = answer
+            response = Response(body, status=status)
+            if replayed:
+                response[REPLAYED_HEADER] = 'true'
+            return response
+        try:
+            response = view(request, *args, **kwargs)
+        except BaseException:
+            _release(request.user.id, key)
+            raise
+        _finish(request.user.id, key, response)
+        return response
+    return wrapper
+
+
+def aidempotent(view):
+    """The same for the async rider views (apply below @rider_view)."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        key, error = _key(request)
+        if error:
+            return JsonResponse(error, status=400)
+        if key is None:
+            return await view(request, *args, **kwargs)
+        answer = await sync_to_async(_begin)(
+            request.user.id, key, _fingerprint(request), FORWARDED_HEADER in request.headers
+        )
+        if answer is not None:
+            status, body, replayed = answer
+            response = JsonResponse(body, status=status, safe=False)
+            if replayed:
+                response[REPLAYED_HEADER] = 'true'
+            return response
+        try:
+            response = await view(request, *args, **kwargs)
+        except BaseException:
+            await sync_to_async(_release)(request.user.id, key)
+            raise
+        await sync_to_async(_finish)(request.user.id, key, response)
+        return response
+    return wrapper
+
+
+def purge_expired(now=None):
+    """Delete keys past their expiry; returns how many."""
+    return IdempotencyKey.objects.filter(expires_at__lte=now or timezone.now()).delete()[0]
@@ -0,0 +1,129 @@
+# core/loadgen.py
+"""
+Shared plumbing for the load-generating management commands: synthetic
+accounts, an in-process or HTTP transport, and a thread-safe latency recorder.
+"""
+import threading
+from collections import defaultdict
+
+import requests
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .metrics import percentile
+from .models import BodabodaProfile, User
+
+BENCH_PASSWORD = 'bench-pass-123'
+
+
+def ensure_bench_users(customers, riders, prefix='bench'):
+    """Create (once) and return synthetic customer and verified rider accounts."""
+    wanted = (
+        [(f'{prefix}_customer{i}', 'customer', f'+25591{i:07d}') for i in range(customers)] +
+        [(f'{prefix}_rider{i}', 'bodaboda', f'+25592{i:07d}') for i in range(riders)]
+    )
+    existing = set(User.objects.filter(username__startswith=f'{prefix}_').values_list('username', flat=True))
+    missing = [row for row in wanted if row[0] not in existing]
+
+    if missing:
+        password = make_password(BENCH_PASSWORD)
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(username=username, user_type=user_type, phone=phone, password=password)
+                for username, user_type, phone in missing
+            ])
+            new_riders = User.objects.filter(
+                username__in=[username for username, user_type, _ in missing if user_type == 'bodaboda']
+            )
+            BodabodaProfile.objects.bulk_create([
+                BodabodaProfile(user=rider, plate_number=f'{prefix.upper()} {rider.id}', id_number=f'B{rider.id}',
+                                verified=True)
+                for rider in new_riders
+            ])
+
+    users = User.objects.filter(username__in=[row[0] for row in wanted]).order_by('id')
+    return (
+        [user for user in users if user.user_type == 'customer'],
+        [user for user in users if user.user_type == 'bodaboda'],
+    )
+
+
+def access_token(user):
+    return str(AccessToken.for_user(user))
+
+
+class InProcessTransport:
+    """Drive the real URLconf through Django's test client, one client per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, method, path, token=None, data=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client(raise_request_exception=False)
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        if method == 'GET':
+            response = client.get(path, headers=headers)
+        else:
+            response = client.post(path, data or {}, content_type='application/json', headers=headers)
+        is_json = response.get('Content-Type', '').startswith('application/json')
+        return response.status_code, response.json() if is_json else None
+
+
+class HttpTransport:
+    """Drive a running server over HTTP, one keep-alive session per thread."""
+
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, method, path, token=None, data=None):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        try:
+            response = session.request(method, self.base_url + path, json=data, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            return 599, None
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+
+def make_transport(base_url=None):
+    return HttpTransport(base_url) if base_url else InProcessTransport()
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(list)
+        self._errors = defaultdict(int)
+
+    def record(self, endpoint, seconds, ok=True):
+        with self._lock:
+            self._samples[endpoint].append(seconds)
+            if not ok:
+                self._errors[endpoint] += 1
+
+    def summary(self, elapsed):
+        report = {}
+        with self._lock:
+            for endpoint, samples in sorted(self._samples.items()):
+                samples = sorted(samples)
+                report[endpoint] = {
+                    'requests': len(samples),
+                    'errors': self._errors[endpoint],
+                    'throughput': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+                    'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+                    'p50_ms': round(percentile(samples, 0.50) * 1000, 3),
+                    'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+                    'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+                }
+        return report
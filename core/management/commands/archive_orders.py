@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.archive import archivable, archive_batch
+from core.models import ArchivedOrder, Order
+from core.utils import refresh_row_estimates
+
+
+class Command(BaseCommand):
+    help = 'Move delivered and cancelled orders older than --days out of the live Order table (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+                            help=f'Archive orders created more than this many days ago '
+                                 f'(default: {settings.ORDER_ARCHIVE_AFTER_DAYS})')
+        parser.add_argument('--batch', type=int, default=1000, help='Orders moved per transaction')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches so live traffic gets the write lock')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch'] < 1:
+            raise CommandError('--days and --batch must be positive')
+
+        if options['dry_run']:
+            self.stdout.write(f"{archivable(options['days']).count():,} orders would be archived.")
+            return
+
+        started = time.perf_counter()
+        total = 0
+        while True:
+            moved = archive_batch(options['days'], options['batch'])
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f"  archived {total:,} orders")
+            if options['pause']:
+                time.sleep(options['pause'])
+        if total:
+            # The admin changelists page by these estimates.
+            refresh_row_estimates(Order, ArchivedOrder)
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {total:,} orders in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import ArchivedOrder, Order
+
+SNAPSHOT_FIELDS = ['product_name', 'unit_price', 'vendor', 'customer_latitude', 'customer_longitude']
+
+
+class Command(BaseCommand):
+    help = 'Fill the order snapshot fields (product name, unit price, vendor, customer location) on older orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        for model in (Order, ArchivedOrder):
+            filled = self.backfill(model, options['batch_size'])
+            self.stdout.write(f"  {model.__name__}: {filled:,} rows filled")
+        self.stdout.write(self.style.SUCCESS("Order snapshots backfilled."))
+
+    def backfill(self, model, batch_size):
+        filled = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk, unit_price__isnull=True)
+                .select_related('product', 'customer')
+                .order_by('pk')[:batch_size]
+            )
+            if not batch:
+                return filled
+            for order in batch:
+                # The price actually paid, not whatever the product costs today.
+                order.unit_price = (order.total_price / (order.quantity or 1)).quantize(Decimal('0.01'))
+                if order.product is not None:
+                    order.product_name = order.product_name or order.product.name
+                    order.vendor_id = order.product.vendor_id
+                order.customer_latitude = order.customer.latitude
+                order.customer_longitude = order.customer.longitude
+            with transaction.atomic():
+                model.objects.bulk_update(batch, SNAPSHOT_FIELDS)
+            filled += len(batch)
+            last_pk = batch[-1].pk
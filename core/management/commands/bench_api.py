@@ -0,0 +1,186 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.loadgen import LatencyRecorder, access_token, ensure_bench_users, make_transport
+from core.models import Product
+
+DEFAULT_MIX = 'browse=40,order=10,location=30,nearby=15,claim=5'
+ADDRESSES = ['Ngambo', 'Stone Town', 'Mwanakwerekwe', 'Darajani', 'Malindi']
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive synthetic marketplace traffic through the API and report per-endpoint '
+        'throughput and latency percentiles. Without --base-url it runs in-process '
+        'against the configured database and creates bench_* accounts and orders there.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', help='Target a running server, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Weighted actions (default: {DEFAULT_MIX})')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+        parser.add_argument('--requests', type=int, help='Stop after this many requests in total')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--customers', type=int, default=50)
+        parser.add_argument('--riders', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--compare', help='Compare p95 latencies with a previous JSON result')
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help='Fail when an endpoint p95 regresses by more than this percent')
+
+    def handle(self, *args, **options):
+        mix = self.parse_mix(options['mix'])
+        customers, riders = ensure_bench_users(options['customers'], options['riders'])
+        self.product_ids = list(Product.objects.filter(is_available=True).values_list('id', flat=True)[:500])
+        if not self.product_ids and 'order' in mix:
+            raise CommandError('No available products to order. Run `seed_tuuziane` first.')
+
+        self.customer_tokens = [access_token(user) for user in customers]
+        self.rider_tokens = [access_token(user) for user in riders]
+        self.transport = make_transport(options['base_url'])
+        self.recorder = LatencyRecorder()
+        self.claimable = deque(maxlen=10000)
+        self.budget = options['requests']
+        self.budget_lock = threading.Lock()
+        self.actions, self.weights = zip(*mix.items())
+
+        with override_settings(PUSH_NOTIFICATIONS_ENABLED=False):
+            elapsed = self.run(options['concurrency'], options['duration'], options['seed'])
+
+        results = {
+            'meta': {
+                'started_at': timezone.now().isoformat(),
+                'target': options['base_url'] or 'in-process',
+                'mix': mix,
+                'concurrency': options['concurrency'],
+                'elapsed_s': round(elapsed, 3),
+            },
+            'endpoints': self.recorder.summary(elapsed),
+        }
+        self.print_results(results['endpoints'])
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options['compare']:
+            self.compare(results['endpoints'], options['compare'], options['threshold'])
+
+    def parse_mix(self, spec):
+        mix = {}
+        for part in spec.split(','):
+            name, _, weight = part.partition('=')
+            name = name.strip()
+            if name not in ('browse', 'order', 'location', 'nearby', 'claim'):
+                raise CommandError(f"Unknown action '{name}' in --mix")
+            try:
+                mix[name] = float(weight)
+            except ValueError:
+                raise CommandError(f"Invalid weight for '{name}' in --mix")
+        return mix
+
+    def run(self, concurrency, duration, seed):
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        if concurrency == 1:
+            self.worker(random.Random(seed), deadline)
+        else:
+            threads = [
+                threading.Thread(target=self.worker, args=(random.Random(seed + i), deadline))
+                for i in range(concurrency)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return time.perf_counter() - started
+
+    def take_budget(self):
+        if self.budget is None:
+            return True
+        with self.budget_lock:
+            if self.budget <= 0:
+                return False
+            self.budget -= 1
+            return True
+
+    def worker(self, rng, deadline):
+        try:
+            while time.perf_counter() < deadline and self.take_budget():
+                action = rng.choices(self.actions, self.weights)[0]
+                getattr(self, f'do_{action}')(rng)
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+
+    def timed(self, endpoint, method, path, token, data=None, accept=()):
+        started = time.perf_counter()
+        status, payload = self.transport.request(method, path, token, data)
+        self.recorder.record(endpoint, time.perf_counter() - started, ok=status < 400 or status in accept)
+        return status, payload
+
+    def do_browse(self, rng):
+        self.timed('products', 'GET', '/api/products/', rng.choice(self.customer_tokens))
+
+    def do_order(self, rng):
+        status, payload = self.timed('orders', 'POST', '/api/orders/', rng.choice(self.customer_tokens), {
+            'product': rng.choice(self.product_ids),
+            'quantity': rng.randint(1, 3),
+            'delivery_address': f"House {rng.randint(1, 200)}, {rng.choice(ADDRESSES)}",
+        })
+        if status == 201 and payload:
+            self.claimable.append(payload['id'])
+
+    def do_location(self, rng):
+        self.timed('location', 'POST', '/api/location/update/', rng.choice(self.rider_tokens), {
+            'latitude': rng.uniform(-6.1750, -6.1550),
+            'longitude': rng.uniform(39.1850, 39.2050),
+        })
+
+    def do_nearby(self, rng):
+        self.timed('nearby', 'GET', '/api/bodaboda/orders/nearby/', rng.choice(self.rider_tokens))
+
+    def do_claim(self, rng):
+        try:
+            order_id = self.claimable.popleft()
+        except IndexError:
+            return self.do_nearby(rng)
+        self.timed('claim', 'POST', f'/api/bodaboda/order/{order_id}/claim/', rng.choice(self.rider_tokens),
+                   accept=(404, 409))
+
+    def print_results(self, endpoints):
+        self.stdout.write(
+            f"{'endpoint':<10} {'reqs':>7} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        )
+        for endpoint, row in endpoints.items():
+            self.stdout.write(
+                f"{endpoint:<10} {row['requests']:>7} {row['errors']:>7} {row['throughput']:>9.1f} "
+                f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f}"
+            )
+
+    def compare(self, current, baseline_path, threshold):
+        with open(baseline_path) as fh:
+            baseline = json.load(fh)['endpoints']
+
+        regressions = []
+        for endpoint, row in current.items():
+            before = baseline.get(endpoint)
+            if not before or not before['p95_ms']:
+                continue
+            change = (row['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+            self.stdout.write(
+                f"{endpoint:<10} p95 {before['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms ({change:+.1f}%)"
+            )
+            if change > threshold:
+                regressions.append(endpoint)
+        if regressions:
+            raise CommandError(f"p95 regressed by more than {threshold}% on: {', '.join(regressions)}")
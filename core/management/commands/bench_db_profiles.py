@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.metrics import percentile
+
+RIDERS = 200
+ORDERS = 2000
+
+
+def _connect(path, profile):
+    """Open a raw connection configured the same way Django configures it."""
+    options = dict(profile['options'])
+    options.pop('transaction_mode', None)
+    conn = sqlite3.connect(path, timeout=options.get('timeout', 5.0), isolation_level=None)
+    for pragma, value in profile['pragmas'].items():
+        conn.execute(f'PRAGMA {pragma}={value}')
+    return conn
+
+
+def _prepare(path, profile):
+    conn = _connect(path, profile)
+    conn.execute('CREATE TABLE rider (id INTEGER PRIMARY KEY, latitude REAL, longitude REAL)')
+    conn.execute('CREATE TABLE orders (id INTEGER PRIMARY KEY, status TEXT, claimed_by INTEGER)')
+    conn.executemany('INSERT INTO rider VALUES (?, 0, 0)', [(i,) for i in range(RIDERS)])
+    conn.executemany("INSERT INTO orders VALUES (?, 'pending', NULL)", [(i,) for i in range(ORDERS)])
+    conn.close()
+
+
+def _worker(args):
+    path, profile, operations, seed = args
+    rng = random.Random(seed)
+    persistent = profile['conn_max_age'] > 0
+    conn = _connect(path, profile) if persistent else None
+    begin = 'BEGIN IMMEDIATE' if profile['options'].get('transaction_mode') else 'BEGIN'
+    latencies, locked = [], 0
+
+    for _ in range(operations):
+        started = time.perf_counter()
+        db = conn or _connect(path, profile)
+        try:
+            roll = rng.random()
+            if roll < 0.6:
+                db.execute(begin)
+                db.execute(
+                    'UPDATE rider SET latitude = ?, longitude = ? WHERE id = ?',
+                    (rng.uniform(-6.2, -6.1), rng.uniform(39.1, 39.3), rng.randrange(RIDERS)),
+                )
+                db.execute('COMMIT')
+            elif roll < 0.8:
+                db.execute(begin)
+                db.execute(
+                    "UPDATE orders SET status = 'assigned', claimed_by = ? "
+                    "WHERE id = ? AND claimed_by IS NULL",
+                    (rng.randrange(RIDERS), rng.randrange(ORDERS)),
+                )
+                db.execute('COMMIT')
+            else:
+                db.execute("SELECT id FROM orders WHERE status = 'pending' LIMIT 50").fetchall()
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError:
+            locked += 1
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+        finally:
+            if conn is None:
+                db.close()
+
+    if conn is not None:
+        conn.close()
+    return latencies, locked
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent rider writes and claims against each SQLite profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=list(settings.SQLITE_PROFILES))
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--operations', type=int, default=500, help='Operations per worker')
+
+    def handle(self, *args, **options):
+        for name in options['profiles']:
+            if name not in settings.SQLITE_PROFILES:
+                raise CommandError(f"Unknown profile '{name}'")
+
+        for name in options['profiles']:
+            profile = settings.SQLITE_PROFILES[name]
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                _prepare(path, profile)
+                jobs = [(path, profile, options['operations'], seed) for seed in range(options['workers'])]
+
+                started = time.perf_counter()
+                with multiprocessing.Pool(options['workers']) as pool:
+                    results = pool.map(_worker, jobs)
+                elapsed = time.perf_counter() - started
+
+            latencies = sorted(l for worker_latencies, _ in results for l in worker_latencies)
+            locked = sum(count for _, count in results)
+            p95 = percentile(latencies, 0.95) * 1000
+            self.stdout.write(
+                f"{name:<12} {len(latencies) / elapsed:>9.0f} ops/s  "
+                f"p95 {p95:>7.2f} ms  locked {locked}"
+            )
@@ -0,0 +1,76 @@
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core.loadgen import access_token, ensure_bench_users
+from core.middleware import brotli
+
+VARIANTS = [
+    ('products', '/api/products/', 'customer'),
+    ('products?fields', '/api/products/?fields=id,name,price,image', 'customer'),
+    ('nearby', '/api/bodaboda/orders/nearby/', 'rider'),
+    ('nearby?fields', '/api/bodaboda/orders/nearby/?fields=id,product_name,total_price,delivery_address', 'rider'),
+    ('my-orders', '/api/my-orders/', 'customer'),
+    ('my-orders?fields', '/api/my-orders/?fields=id,status,product_name,total_price,created_at', 'customer'),
+]
+
+
+def server_timing(header):
+    """{'db': 1.2, 'cmp': 0.3, ...} from a Server-Timing header."""
+    spans = {}
+    for metric in header.split(','):
+        name, _, params = metric.strip().partition(';')
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'dur':
+                spans[name] = float(value)
+    return spans
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure response size and server time for list endpoints with and without '
+        '?fields= and per content coding (identity, gzip, br). Runs in-process against '
+        'the configured database using the bench_* accounts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per variant and coding')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be positive')
+        customers, riders = ensure_bench_users(1, 1)
+        tokens = {'customer': access_token(customers[0]), 'rider': access_token(riders[0])}
+        encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+        client = Client()
+
+        self.stdout.write(
+            f"{'variant':<18} {'coding':<9} {'bytes':>9} {'vs full':>8} {'total ms':>9} {'ser ms':>7} {'cmp ms':>7}"
+        )
+        full_sizes = {}
+        for name, path, role in VARIANTS:
+            endpoint = name.partition('?')[0]
+            for encoding in encodings:
+                sizes, totals, serialize, compress = [], [], [], []
+                for _ in range(options['repeat']):
+                    response = client.get(path, headers={
+                        'Authorization': f'Bearer {tokens[role]}', 'Accept-Encoding': encoding
+                    })
+                    if response.status_code != 200:
+                        raise CommandError(f"{path} returned {response.status_code}")
+                    spans = server_timing(response['Server-Timing'])
+                    sizes.append(len(response.content))
+                    totals.append(spans['total'])
+                    serialize.append(spans['ser'])
+                    compress.append(spans['cmp'])
+                size = int(statistics.median(sizes))
+                full_size = full_sizes.setdefault(endpoint, size)  # the first row is full and uncompressed
+                self.stdout.write(
+                    f"{name:<18} {encoding:<9} {size:>9,} {size / full_size if full_size else 1:>7.0%} "
+                    f"{statistics.median(totals):>9.2f} {statistics.median(serialize):>7.2f} "
+                    f"{statistics.median(compress):>7.2f}"
+                )
+        if brotli is None:
+            self.stdout.write("(install `brotli` to measure br)")
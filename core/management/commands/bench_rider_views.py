@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.metrics import percentile
+from core.models import User
+
+SCENARIOS = [
+    ('location', 'post', '/api/location/update/', '/api/async/location/update/',
+     {'latitude': -6.165, 'longitude': 39.195}),
+    ('nearby', 'get', '/api/bodaboda/orders/nearby/', '/api/async/bodaboda/orders/nearby/', None),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare the sync and async rider endpoints under concurrent load through the ASGI handler'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', default='boda1', help='Bodaboda account to authenticate as')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per endpoint variant')
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            rider = User.objects.get(username=options['username'], user_type='bodaboda')
+        except User.DoesNotExist:
+            raise CommandError(f"No bodaboda named '{options['username']}'. Run `seed_tuuziane` first.")
+        token = str(AccessToken.for_user(rider))
+
+        for name, method, sync_path, async_path, body in SCENARIOS:
+            for variant, path in (('sync', sync_path), ('async', async_path)):
+                rate, latencies = asyncio.run(
+                    self.drive(token, method, path, body, options['requests'], options['concurrency'])
+                )
+                p50 = percentile(latencies, 0.50) * 1000
+                p95 = percentile(latencies, 0.95) * 1000
+                self.stdout.write(
+                    f"{name:<10} {variant:<6} {rate:>8.0f} req/s  p50 {p50:>7.2f} ms  p95 {p95:>7.2f} ms"
+                )
+
+    async def drive(self, token, method, path, body, total, concurrency):
+        client = AsyncClient()
+        headers = {'Authorization': f'Bearer {token}'}
+        latencies = []
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                if method == 'post':
+                    response = await client.post(path, body, content_type='application/json', headers=headers)
+                else:
+                    response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    raise CommandError(f"{path} returned {response.status_code}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        return total / elapsed, sorted(latencies)
@@ -0,0 +1,71 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.expiry import expire_batch, reconcile_availability, stale_claims
+from core.metrics import record_job
+
+JOB = 'expire_stale_claims'
+
+
+class Command(BaseCommand):
+    help = (
+        'Release orders claimed but not picked up within --minutes back to pending, then recompute '
+        'rider availability from in-flight orders. Run from cron, or keep it running with --loop.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=settings.CLAIM_EXPIRY_MINUTES,
+                            help=f'Expire claims older than this (default: {settings.CLAIM_EXPIRY_MINUTES})')
+        parser.add_argument('--batch', type=int, default=500, help='Claims released per transaction')
+        parser.add_argument('--loop', action='store_true', help='Keep running every --interval seconds')
+        parser.add_argument('--interval', type=float, default=60.0, help='Seconds between runs with --loop')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the stale claims')
+
+    def handle(self, *args, **options):
+        if options['minutes'] < 1 or options['batch'] < 1:
+            raise CommandError('--minutes and --batch must be positive')
+
+        if options['dry_run']:
+            self.stdout.write(f"{stale_claims(options['minutes']).count():,} claims would expire.")
+            return
+
+        try:
+            while True:
+                self.run(options['minutes'], options['batch'])
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def run(self, minutes, batch_size):
+        started_at = timezone.now()
+        started = time.perf_counter()
+        expired, batches, oldest = 0, 0, 0.0
+        while True:
+            orders = expire_batch(minutes, batch_size, now=started_at)
+            if not orders:
+                break
+            batches += 1
+            expired += len(orders)
+            oldest = max(oldest, *((started_at - order.claimed_at).total_seconds() for order in orders))
+        expire_ms = (time.perf_counter() - started) * 1000
+
+        made_busy, made_free = reconcile_availability(settings.RIDER_MAX_ACTIVE_ORDERS)
+        duration_ms = (time.perf_counter() - started) * 1000
+        stats = {
+            'expired': expired,
+            'batches': batches,
+            'oldest_claim_minutes': round(oldest / 60, 1),
+            'riders_made_busy': made_busy,
+            'riders_made_available': made_free,
+            'expire_ms': round(expire_ms, 1),
+            'reconcile_ms': round(duration_ms - expire_ms, 1),
+        }
+        record_job(JOB, started_at, duration_ms, stats)
+        self.stdout.write(f"{JOB} {duration_ms:.0f} ms {json.dumps(stats)}")
+        return stats
@@ -0,0 +1,49 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core.exports import EXPORT_FORMATS, export_querysets, stream_export
+from core.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Stream orders with customer, product, vendor and rider details as CSV or JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='First day to include (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', help='Last day to include (YYYY-MM-DD)')
+        parser.add_argument('--status', action='append', choices=[choice for choice, _ in Order.STATUS_CHOICES],
+                            help='Repeat to include several statuses')
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = self.parse_day(options['start'], '--from')
+        end = self.parse_day(options['end'], '--to')
+        querysets = export_querysets(start, end, options['status'])
+
+        out = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        lines = 0
+        try:
+            for line in stream_export(querysets, options['format'], options['chunk_size']):
+                out.write(line)
+                lines += 1
+        finally:
+            if options['output']:
+                out.close()
+        if options['output']:
+            rows = lines - 1 if options['format'] == 'csv' else lines
+            self.stderr.write(f"Exported {rows:,} orders to {options['output']}")
+
+    def parse_day(self, value, flag):
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:  # well-formed but impossible, like 2025-02-30
+            day = None
+        if day is None:
+            raise CommandError(f"{flag} must be a date like 2025-10-31")
+        return day
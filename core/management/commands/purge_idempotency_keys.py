@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.idempotency import purge_expired
+from core.metrics import record_job
+
+
+class Command(BaseCommand):
+    help = 'Delete Idempotency-Key records past their expiry. Run from cron (hourly is plenty).'
+
+    def handle(self, *args, **options):
+        started_at = timezone.now()
+        started = time.perf_counter()
+        purged = purge_expired(started_at)
+        duration_ms = (time.perf_counter() - started) * 1000
+        record_job('purge_idempotency_keys', started_at, duration_ms, {'purged': purged})
+        self.stdout.write(f"Purged {purged:,} expired idempotency keys in {duration_ms:.0f} ms.")
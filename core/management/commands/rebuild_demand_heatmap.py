@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.heatmap import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the demand heatmap from recent orders (after bulk loads or to repair drift)'
+
+    def handle(self, *args, **options):
+        cells = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {cells} demand heatmap cells."))
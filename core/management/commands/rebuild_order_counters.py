@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.transitions import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount live orders per status and zone (after bulk loads or to repair drift)'
+
+    def handle(self, *args, **options):
+        counters = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {counters} order status counters."))
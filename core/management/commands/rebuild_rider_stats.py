@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.rider_stats import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Recompute rider leaderboard stats from the full order history (one-off backfill or repair)'
+
+    def handle(self, *args, **options):
+        riders = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Rider stats rebuilt for {riders} riders."))
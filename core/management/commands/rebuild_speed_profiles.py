@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.eta import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Relearn the per-zone, per-hour ETA speed profiles from delivered orders'
+
+    def handle(self, *args, **options):
+        profiles = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {profiles} speed profiles."))
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.rollups import rebuild_day
+
+
+class Command(BaseCommand):
+    help = 'Rebuild vendor daily sales rollups from delivered orders (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2,
+                            help='Rebuild this many days back from today (default: yesterday and today)')
+        parser.add_argument('--from', dest='start', help='First day to rebuild (YYYY-MM-DD); overrides --days')
+        parser.add_argument('--to', dest='end', help='Last day to rebuild (YYYY-MM-DD, default today)')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        end = self.parse_day(options['end'], '--to') if options['end'] else today
+        start = (
+            self.parse_day(options['start'], '--from') if options['start']
+            else today - timedelta(days=options['days'] - 1)
+        )
+        if start > end:
+            raise CommandError('--from must be on or before --to')
+
+        day = start
+        while day <= end:
+            rows = rebuild_day(day)
+            self.stdout.write(f"  {day}: {rows} rollup rows")
+            day += timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Rollups rebuilt for {start} to {end}."))
+
+    def parse_day(self, value, flag):
+        try:
+            day = parse_date(value)
+        except ValueError:  # well-formed but impossible, like 2025-02-30
+            day = None
+        if day is None:
+            raise CommandError(f"{flag} must be a date like 2025-10-31")
+        return day
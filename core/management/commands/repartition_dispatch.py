@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.dispatch import partition_count, repartition
+
+
+class Command(BaseCommand):
+    help = 'Reassign orders and riders to dispatch partitions (after changing DISPATCH_NODES or a bulk load)'
+
+    def handle(self, *args, **options):
+        zones, riders = repartition()
+        self.stdout.write(self.style.SUCCESS(
+            f"Assigned {zones} order zones and {riders} riders across {partition_count()} partitions."
+        ))
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Run one local runserver process per dispatch partition on consecutive ports, '
+        'all sharing this database, to try zone-partitioned dispatch on one machine.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nodes', type=int, default=3, help='Number of partitions / processes')
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--base-port', type=int, default=8001)
+        parser.add_argument('--forward', action='store_true',
+                            help='Proxy requests to the owning node instead of redirecting the client')
+        parser.add_argument('--no-repartition', action='store_true',
+                            help='Skip reassigning orders and riders to the new partitions first')
+
+    def handle(self, *args, **options):
+        if options['nodes'] < 1:
+            raise CommandError('--nodes must be at least 1')
+        urls = [f"http://{options['host']}:{options['base_port'] + i}" for i in range(options['nodes'])]
+        env = dict(os.environ, TUUZIANE_DISPATCH_NODES=','.join(urls),
+                   TUUZIANE_DISPATCH_FORWARD='1' if options['forward'] else '0')
+
+        if not options['no_repartition']:
+            subprocess.run(
+                [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'repartition_dispatch'], env=env, check=True
+            )
+
+        processes = []
+        for partition, url in enumerate(urls):
+            processes.append(subprocess.Popen(
+                [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'runserver', '--noreload',
+                 url.split('://', 1)[1]],
+                env=dict(env, TUUZIANE_DISPATCH_PARTITION=str(partition)),
+            ))
+            self.stdout.write(f"🧭 partition {partition} → {url}")
+
+        how = 'proxies it to' if options['forward'] else 'redirects (307) it to'
+        self.stdout.write(f"Any node accepts a rider request and {how} the owning node. Ctrl-C to stop.")
+        try:
+            while all(process.poll() is None for process in processes):
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait()
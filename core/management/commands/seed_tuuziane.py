@@ -1,8 +1,23 @@
 # core/management/commands/seed_tuuziane.py
 import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
 from core.models import VendorProfile, BodabodaProfile, Category, Product, Order
+from core.dispatch import repartition
+from core.eta import rebuild as rebuild_speed_profiles
+from core.heatmap import rebuild as rebuild_heatmap
+from core.rider_stats import rebuild_all as rebuild_rider_stats
+from core.rollups import rebuild_day as rebuild_sales_day
+from core.transitions import rebuild_counters
+from core.utils import grid_cell, zone_for
 from django.utils.text import slugify
 
 User = get_user_model()
@@ -30,9 +45,32 @@ CATEGORIES = ["Street Food", "Fresh Produce", "Spices", "Drinks", "Snacks"]
 BODABODA_PLATES = ["T 123 AB", "Z 456 CD", "T 789 EF", "Z 101 GH", "T 202 IJ"]
 NAMES = ["Juma", "Aisha", "Hussein", "Fatma", "Rashid", "Zainab", "Khalid", "Mwanaidi"]
 
+# --scale 1 means this many rows; everything grows linearly with the scale.
+SCALE_UNIT = {'vendors': 200, 'riders': 1000, 'customers': 10000, 'orders': 100000}
+PRODUCTS_PER_VENDOR = 10
+
+# Demand hotspots around Zanzibar Town (lat, lng, spread in degrees).
+HOTSPOTS = [
+    (-6.1630, 39.1890, 0.004),  # Stone Town
+    (-6.1700, 39.2000, 0.006),  # Darajani / Mwembeladu
+    (-6.1820, 39.2150, 0.008),  # Mwanakwerekwe
+    (-6.1500, 39.2050, 0.007),  # Malindi / Bububu road
+]
+
+# Share of seeded orders in each status; older orders are mostly finished.
+STATUS_WEIGHTS = {'delivered': 70, 'cancelled': 5, 'picked_up': 5, 'assigned': 8, 'pending': 12}
+
 class Command(BaseCommand):
     help = 'Seed database with realistic TUUZIANE data'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float,
+            help=f"Bulk mode: generate {SCALE_UNIT['orders']:,} orders (and matching users/products) per unit"
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=90, help='Spread bulk orders over this many days')
+
     def handle(self, *args, **options):
         self.stdout.write('⚠️  Deleting old data...')
         Order.objects.all().delete()
@@ -44,6 +82,9 @@ class Command(BaseCommand):
 
         self.stdout.write('✅ Old data cleared.')
 
+        if options['scale']:
+            return self.seed_bulk(options['scale'], options['batch_size'], options['days'])
+
         # === 1. Create Categories ===
         categories = {}
         for cat_name in CATEGORIES:
@@ -65,10 +106,13 @@ class Command(BaseCommand):
                 password="vendor123",
                 user_type="vendor"
             )
+            lat, lng, spread = random.choice(HOTSPOTS)
             vendor_profile = VendorProfile.objects.create(
                 user=user,
                 business_name=biz,
-                location_description=f"Near {biz.split()[-1]} Market"
+                location_description=f"Near {biz.split()[-1]} Market",
+                latitude=random.gauss(lat, spread),
+                longitude=random.gauss(lng, spread)
             )
             vendors.append(user)
             self.stdout.write(f'  🏪 Vendor: {biz}')
@@ -142,12 +186,212 @@ class Command(BaseCommand):
                 total_price=total,
                 status=random.choice(['pending', 'assigned', 'delivered']),
                 bodaboda=bodaboda,
+                **Order.snapshot(product, customer),
                 delivery_address=f"House {random.randint(1,100)}, {random.choice(['Ngambo', 'Stone Town', 'Mwanakwerekwe'])}"
             )
             self.stdout.write(f'  📦 Order #{order.id}: {product.name} x{quantity} → {bodaboda.username}')
 
+        rebuild_counters()
+        rebuild_rider_stats()
+        rebuild_heatmap()
+        rebuild_speed_profiles()
+        repartition()
+
         self.stdout.write(self.style.SUCCESS('✨ TUUZIANE database seeded successfully!'))
         self.stdout.write('🔑 Login credentials:')
         self.stdout.write('   Customer: customer1 / customer123')
         self.stdout.write('   Vendor: vendor1 / vendor123')
-        self.stdout.write('   Bodaboda: boda1 / boda123')
\ No newline at end of file
+        self.stdout.write('   Bodaboda: boda1 / boda123')
+
+    # ======================
+    #  Bulk mode (--scale)
+    # ======================
+
+    def seed_bulk(self, scale, batch_size, days):
+        started = time.perf_counter()
+        rng = random.Random(42)
+        counts = {key: max(1, int(value * scale)) for key, value in SCALE_UNIT.items()}
+        # Hash each role's password once; PBKDF2 per user is what made seeding crawl.
+        passwords = {role: make_password(f"{role}123") for role in ('vendor', 'boda', 'customer')}
+
+        categories = [
+            Category.objects.get_or_create(name=name, slug=slugify(name))[0] for name in CATEGORIES
+        ]
+
+        vendor_ids = self.bulk_users(
+            'vendor', 'vendor', counts['vendors'], '+25571', passwords['vendor'], batch_size, rng, located=False
+        )
+        def vendor_profiles():
+            for i, user_id in enumerate(vendor_ids):
+                lat, lng, spread = rng.choice(HOTSPOTS)
+                lat, lng = rng.gauss(lat, spread), rng.gauss(lng, spread)
+                # bulk_create skips save(), which normally fills in the grid cell.
+                cell_row, cell_col = grid_cell(lat, lng)
+                yield VendorProfile(
+                    user_id=user_id,
+                    business_name=f"{rng.choice(VENDOR_BUSINESSES)} #{i + 1}",
+                    location_description=f"Near {rng.choice(['Darajani', 'Forodhani', 'Mwanakwerekwe'])} Market",
+                    latitude=lat,
+                    longitude=lng,
+                    cell_row=cell_row,
+                    cell_col=cell_col
+                )
+
+        self.bulk_insert(VendorProfile, vendor_profiles(), batch_size)
+
+        rider_ids = self.bulk_users(
+            'boda', 'bodaboda', counts['riders'], '+25574', passwords['boda'], batch_size, rng, located=True
+        )
+        self.bulk_insert(BodabodaProfile, (
+            BodabodaProfile(
+                user_id=user_id,
+                plate_number=f"Z {i + 1:06d}",
+                id_number=f"ID{user_id:010d}",
+                verified=rng.random() < 0.9,
+                is_available=rng.random() < 0.7
+            )
+            for i, user_id in enumerate(rider_ids)
+        ), batch_size)
+
+        customer_ids = self.bulk_users(
+            'customer', 'customer', counts['customers'], '+25575', passwords['customer'], batch_size, rng,
+            located=True
+        )
+
+        self.bulk_insert(Product, (
+            Product(
+                vendor_id=vendor_id,
+                name=item["name"],
+                description=item["desc"],
+                price=Decimal(item["price"]) * Decimal(rng.choice(['0.8', '1', '1', '1.2', '1.5'])),
+                image="products/default.jpg",
+                category=rng.choice(categories),
+                is_available=rng.random() < 0.95
+            )
+            for vendor_id in vendor_ids
+            for item in rng.choices(PRODUCTS_DATA, k=PRODUCTS_PER_VENDOR)
+        ), batch_size)
+        products = list(
+            Product.objects.filter(vendor_id__in=vendor_ids).values_list('id', 'price', 'name', 'vendor_id')
+        )
+
+        locations = {
+            user_id: (lat, lng)
+            for user_id, lat, lng in User.objects.filter(id__in=customer_ids).values_list('id', 'latitude', 'longitude')
+        }
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        now = timezone.now()
+        window = timedelta(days=days).total_seconds()
+
+        def orders():
+            for _ in range(counts['orders']):
+                product_id, price, name, vendor_id = rng.choice(products)
+                quantity = rng.randint(1, 3)
+                status = rng.choices(statuses, weights)[0]
+                created_at = now - timedelta(seconds=window * rng.random() ** 2)
+                customer_id = rng.choice(customer_ids)
+                lat, lng = locations[customer_id]
+                order = Order(
+                    customer_id=customer_id,
+                    zone=zone_for(lat, lng),
+                    product_id=product_id,
+                    product_name=name,
+                    unit_price=price,
+                    vendor_id=vendor_id,
+                    customer_latitude=lat,
+                    customer_longitude=lng,
+                    quantity=quantity,
+                    total_price=price * quantity,
+                    status=status,
+                    delivery_address=f"House {rng.randint(1, 400)}, {rng.choice(['Ngambo', 'Stone Town', 'Mwanakwerekwe'])}",
+                    created_at=created_at
+                )
+                if status in ('assigned', 'picked_up', 'delivered'):
+                    rider_id = rng.choice(rider_ids)
+                    order.bodaboda_id = order.claimed_by_id = rider_id
+                    order.claimed_at = created_at + timedelta(minutes=rng.uniform(1, 10))
+                if status == 'delivered':
+                    order.is_delivered = True
+                    order.delivered_at = order.claimed_at + timedelta(minutes=rng.uniform(10, 60))
+                    order.bodaboda_rating = rng.choice([0, 3, 4, 4, 5, 5])
+                yield order
+
+        with keep_explicit_timestamps(Order):
+            self.bulk_insert(Order, orders(), batch_size, progress=True)
+        rebuild_counters()
+        rebuild_rider_stats()
+        self.rebuild_sales_rollups()
+        rebuild_heatmap()
+        rebuild_speed_profiles()
+        repartition()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✨ Bulk seeded {counts['vendors']:,} vendors, {counts['riders']:,} riders, "
+            f"{counts['customers']:,} customers, {len(products):,} products and {counts['orders']:,} orders "
+            f"in {elapsed:.0f}s"
+        ))
+        self.stdout.write('🔑 Passwords: vendor123 / boda123 / customer123 (e.g. vendor1, boda1, customer1)')
+
+    def rebuild_sales_rollups(self):
+        """VendorDailySales for every day with seeded deliveries (what reconcile_sales_rollups does nightly)."""
+        span = Order.objects.filter(status='delivered').aggregate(first=Min('delivered_at'), last=Max('delivered_at'))
+        if span['first'] is None:
+            return
+        day, last = timezone.localdate(span['first']), timezone.localdate(span['last'])
+        while day <= last:
+            rebuild_sales_day(day)
+            day += timedelta(days=1)
+
+    def bulk_users(self, prefix, user_type, count, phone_prefix, password, batch_size, rng, located):
+        def users():
+            for i in range(count):
+                user = User(
+                    username=f"{prefix}{i + 1}",
+                    email=f"{prefix}{i + 1}@tuuziane.tz",
+                    phone=f"{phone_prefix}{i + 1:07d}",
+                    password=password,
+                    user_type=user_type
+                )
+                if located and rng.random() < 0.8:
+                    lat, lng, spread = rng.choice(HOTSPOTS)
+                    user.latitude = rng.gauss(lat, spread)
+                    user.longitude = rng.gauss(lng, spread)
+                yield user
+
+        self.bulk_insert(User, users(), batch_size)
+        return list(
+            User.objects.filter(user_type=user_type, username__startswith=prefix)
+            .order_by('id').values_list('id', flat=True)
+        )
+
+    def bulk_insert(self, model, objects, batch_size, progress=False):
+        total = 0
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                total += self.flush(model, batch)
+                batch = []
+                if progress:
+                    self.stdout.write(f"    … {total:,} {model._meta.verbose_name_plural}")
+        if batch:
+            total += self.flush(model, batch)
+        self.stdout.write(f"  ✅ {total:,} {model._meta.verbose_name_plural}")
+        return total
+
+    def flush(self, model, batch):
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=len(batch))
+        return len(batch)
+
+
+@contextmanager
+def keep_explicit_timestamps(model):
+    """Let bulk_create store the generated created_at instead of auto_now_add's now()."""
+    field = model._meta.get_field('created_at')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
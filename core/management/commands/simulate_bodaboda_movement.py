@@ -1,31 +1,173 @@
+import math
 import random
-from django.core.management.base import BaseCommand
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core.dispatch import locate
+from core.loadgen import LatencyRecorder, access_token, make_transport
 from core.models import User
 
 MIN_LAT, MAX_LAT = -6.1750, -6.1550
 MIN_LNG, MAX_LNG = 39.1850, 39.2050
+METERS_PER_DEGREE = 111_320
+
+
+class Rider:
+    """Random walk with a slowly drifting heading, bounced off the service area edges."""
+
+    def __init__(self, user, rng):
+        self.user = user
+        self.rng = rng
+        self.lat = user.latitude if user.latitude is not None else rng.uniform(MIN_LAT, MAX_LAT)
+        self.lng = user.longitude if user.longitude is not None else rng.uniform(MIN_LNG, MAX_LNG)
+        self.heading = rng.uniform(0, 2 * math.pi)
+        self.speed = rng.uniform(4, 12)  # m/s, town traffic on a motorbike
+        self.token = None
+
+    def step(self, seconds):
+        self.heading += self.rng.gauss(0, 0.4)
+        distance = self.speed * seconds
+        self.lat += distance * math.cos(self.heading) / METERS_PER_DEGREE
+        self.lng += distance * math.sin(self.heading) / (METERS_PER_DEGREE * math.cos(math.radians(self.lat)))
+        if not MIN_LAT <= self.lat <= MAX_LAT:
+            self.lat = min(max(self.lat, MIN_LAT), MAX_LAT)
+            self.heading = math.pi - self.heading
+        if not MIN_LNG <= self.lng <= MAX_LNG:
+            self.lng = min(max(self.lng, MIN_LNG), MAX_LNG)
+            self.heading = -self.heading
+
 
 class Command(BaseCommand):
     help = 'Simulate bodaboda riders moving around Zanzibar'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep riders moving instead of a single jump')
+        parser.add_argument('--riders', type=int, help='Simulate at most this many verified riders')
+        parser.add_argument('--rate', type=float, default=0.2, help='Location pings per second per rider')
+        parser.add_argument('--duration', type=float, default=0, help='Seconds to run with --loop (0 = forever)')
+        parser.add_argument('--mode', choices=['orm', 'http'], default='orm',
+                            help='Write through bulk_update or through the update_location endpoint')
+        parser.add_argument('--base-url', help='With --mode http, target a running server instead of in-process')
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent HTTP clients with --mode http')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int)
+
     def handle(self, *args, **options):
         bodabodas = User.objects.filter(
             user_type='bodaboda',
             bodaboda_profile__verified=True
-        )
+        ).order_by('id')
+        if options['riders']:
+            bodabodas = bodabodas[:options['riders']]
 
         if not bodabodas.exists():
             self.stdout.write("No verified bodabodas found. Run `seed_tuuziane` first.")
             return
 
+        if options['loop']:
+            return self.simulate(list(bodabodas), options)
+
         for boda in bodabodas:
             boda.latitude = random.uniform(MIN_LAT, MAX_LAT)
             boda.longitude = random.uniform(MIN_LNG, MAX_LNG)
-            boda.save(update_fields=['latitude', 'longitude'])
+            boda.zone, boda.dispatch_partition = locate(boda.latitude, boda.longitude)
+            boda.save(update_fields=['latitude', 'longitude', 'zone', 'dispatch_partition'])
             self.stdout.write(
                 f"📍 {boda.username} moved to ({boda.latitude:.4f}, {boda.longitude:.4f})"
             )
 
         self.stdout.write(
             self.style.SUCCESS(f"Updated {bodabodas.count()} bodaboda locations.")
-        )
\ No newline at end of file
+        )
+
+    def simulate(self, users, options):
+        if options['rate'] <= 0:
+            raise CommandError('--rate must be positive')
+        rng = random.Random(options['seed'])
+        riders = [Rider(user, rng) for user in users]
+        target = len(riders) * options['rate']
+        interval = 1 / options['rate']
+
+        if options['mode'] == 'http':
+            self.transport = make_transport(options['base_url'])
+            self.recorder = LatencyRecorder()
+            self.pool = ThreadPoolExecutor(options['workers'])
+            for rider in riders:
+                rider.token = access_token(rider.user)
+
+        self.stdout.write(
+            f"🏍️  {len(riders):,} riders pinging every {interval:.1f}s via {options['mode']} "
+            f"(target {target:,.0f} updates/s). Ctrl-C to stop."
+        )
+
+        # Stagger riders evenly across one ping interval so load is smooth.
+        started = time.perf_counter()
+        due = [started + interval * i / len(riders) for i in range(len(riders))]
+        deadline = started + options['duration'] if options['duration'] else None
+        sent = 0
+        cursor = 0
+        last_report, sent_at_report = started, 0
+
+        try:
+            while deadline is None or time.perf_counter() < deadline:
+                now = time.perf_counter()
+                batch = []
+                while len(batch) < len(riders) and due[cursor] <= now:
+                    rider = riders[cursor]
+                    rider.step(interval)
+                    batch.append(rider)
+                    due[cursor] += interval
+                    cursor = (cursor + 1) % len(riders)
+
+                if batch:
+                    sent += self.push(batch, options)
+                else:
+                    time.sleep(min(0.05, max(0.0, due[cursor] - now)))
+
+                if now - last_report >= 5:
+                    rate = (sent - sent_at_report) / (now - last_report)
+                    self.stdout.write(f"  {rate:,.0f} updates/s (target {target:,.0f})")
+                    last_report, sent_at_report = now, sent
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if options['mode'] == 'http':
+                self.pool.shutdown(wait=True)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {sent:,} location updates in {elapsed:.1f}s: {sent / elapsed:,.0f} updates/s "
+            f"(target {target:,.0f})"
+        ))
+        if options['mode'] == 'http':
+            stats = self.recorder.summary(elapsed).get('location')
+            if stats:
+                self.stdout.write(
+                    f"  update_location p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, "
+                    f"errors {stats['errors']}"
+                )
+
+    def push(self, batch, options):
+        if options['mode'] == 'orm':
+            for rider in batch:
+                rider.user.latitude, rider.user.longitude = rider.lat, rider.lng
+                # As update_location does, so riders follow their zone onto its partition.
+                rider.user.zone, rider.user.dispatch_partition = locate(rider.lat, rider.lng)
+            with transaction.atomic():
+                User.objects.bulk_update(
+                    [rider.user for rider in batch], ['latitude', 'longitude', 'zone', 'dispatch_partition'],
+                    batch_size=options['batch_size']
+                )
+            return len(batch)
+
+        list(self.pool.map(self.ping, batch))
+        return len(batch)
+
+    def ping(self, rider):
+        started = time.perf_counter()
+        status, _ = self.transport.request(
+            'POST', '/api/location/update/', rider.token, {'latitude': rider.lat, 'longitude': rider.lng}
+        )
+        self.recorder.record('location', time.perf_counter() - started, ok=status == 200)
@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from core.models import ReplicaHeartbeat
+from core.routers import REPLICA
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the read replica file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep syncing until interrupted')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between syncs with --loop')
+
+    def handle(self, *args, **options):
+        if REPLICA not in settings.DATABASES:
+            raise CommandError('No replica configured. Set TUUZIANE_REPLICA_DB first.')
+
+        while True:
+            started = time.perf_counter()
+            self.sync()
+            self.stdout.write(f"Replica synced in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def sync(self):
+        ReplicaHeartbeat.objects.update_or_create(pk=1, defaults={'beat': timezone.now()})
+
+        # Replica readers may hold the file open, so copy into it in place with the
+        # online backup API rather than swapping the file underneath them.
+        connections[REPLICA].close()
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        target = sqlite3.connect(settings.DATABASES[REPLICA]['NAME'])
+        try:
+            source.backup(target, pages=1024)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,141 @@
+# core/metrics.py
+"""
+In-process request metrics: per-request spans (DB, serializer) and per-endpoint
+latency histograms. Histograms live in worker memory, so each process reports
+only the requests it served. Background jobs, which run in their own
+processes, persist one JobRun row per run instead (record_job).
+"""
+import bisect
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Geometric bucket bounds from 0.1 ms to ~100 s; each is 25% above the last,
+# so a reported percentile is never more than 25% above the true value.
+BUCKET_BOUNDS_MS = [0.1 * 1.25 ** i for i in range(63)]
+
+_current = ContextVar('request_metrics', default=None)
+_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(BUCKET_BOUNDS_MS[index], self.max) if index < len(BUCKET_BOUNDS_MS) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            'p50': round(self.percentile(0.50), 2),
+            'p95': round(self.percentile(0.95), 2),
+            'p99': round(self.percentile(0.99), 2),
+            'max': round(self.max, 2),
+            'mean': round(self.total / self.count, 2) if self.count else 0.0,
+        }
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(q * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+_endpoints = defaultdict(lambda: defaultdict(Histogram))
+
+
+def start_request():
+    return _current.set({'db': 0.0, 'queries': 0, 'serialize': 0.0, 'compress': 0.0})
+
+
+def finish_request(token):
+    spans = _current.get()
+    _current.reset(token)
+    return spans
+
+
+def add(name, elapsed_ms, queries=0):
+    spans = _current.get()
+    if spans is not None:
+        spans[name] += elapsed_ms
+        spans['queries'] += queries
+
+
+@contextmanager
+def span(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, (time.perf_counter() - started) * 1000)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper; installed on every connection by CoreConfig.ready()."""
+    if _current.get() is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        add('db', (time.perf_counter() - started) * 1000, queries=1)
+
+
+def observe(endpoint, total_ms, spans):
+    with _lock:
+        histograms = _endpoints[endpoint]
+        histograms['total'].observe(total_ms)
+        histograms['db'].observe(spans['db'])
+        histograms['serialize'].observe(spans['serialize'])
+        histograms['compress'].observe(spans['compress'])
+        histograms['queries'].observe(spans['queries'])
+
+
+def snapshot():
+    with _lock:
+        return {
+            endpoint: dict(
+                {'count': histograms['total'].count},
+                **{name: histogram.summary() for name, histogram in histograms.items()}
+            )
+            for endpoint, histograms in _endpoints.items()
+        }
+
+
+def reset():
+    with _lock:
+        _endpoints.clear()
+
+
+def record_job(job, started_at, duration_ms, stats):
+    """Persist one background job run and trim that job's history to JOB_RUN_RING_SIZE."""
+    from django.conf import settings
+    from .models import JobRun
+
+    JobRun.objects.create(job=job, started_at=started_at, duration_ms=duration_ms, stats=stats)
+    stale = JobRun.objects.filter(job=job).order_by('-started_at').values_list('pk', flat=True)[
+        settings.JOB_RUN_RING_SIZE:
+    ]
+    JobRun.objects.filter(pk__in=list(stale)).delete()
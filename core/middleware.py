@@ -0,0 +1,119 @@
+# core/middleware.py
+import gzip
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/csv', 'text/plain')
+_coding_re = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+class PerformanceMiddleware:
+    """
+    Time every request, attach a Server-Timing header and feed the per-endpoint
+    histograms in core.metrics. Works for both the sync DRF views and the
+    native async rider views.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            spans = metrics.finish_request(token)
+        return self.finish(request, response, started, spans)
+
+    async def __acall__(self, request):
+        token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            spans = metrics.finish_request(token)
+        return self.finish(request, response, started, spans)
+
+    def finish(self, request, response, started, spans):
+        total_ms = (time.perf_counter() - started) * 1000
+        response['Server-Timing'] = (
+            f'db;desc="{spans["queries"]} queries";dur={spans["db"]:.2f}, '
+            f'ser;dur={spans["serialize"]:.2f}, '
+            f'cmp;dur={spans["compress"]:.2f}, '
+            f'total;dur={total_ms:.2f}'
+        )
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            metrics.observe(match.url_name or match.route, total_ms, spans)
+        return response
+
+
+def accepted_encodings(header):
+    """Content codings the client accepts (q > 0), from an Accept-Encoding header."""
+    accepted = set()
+    for part in header.split(','):
+        match = _coding_re.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+        if quality > 0:
+            accepted.add(match[1].lower())
+    return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Negotiated brotli (when installed) or gzip for API payloads above
+    COMPRESSION_MIN_BYTES. Only JSON, CSV and plain text are compressed;
+    HTML pages that carry CSRF tokens are left alone (BREACH).
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < settings.COMPRESSION_MIN_BYTES:
+            return response
+
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        started = time.perf_counter()
+        if brotli is not None and 'br' in accepted:
+            encoding, body = 'br', brotli.compress(response.content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        elif 'gzip' in accepted:
+            encoding, body = 'gzip', gzip.compress(
+                response.content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0
+            )
+        else:
+            return response
+        metrics.add('compress', (time.perf_counter() - started) * 1000)
+
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        return response
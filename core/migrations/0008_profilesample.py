@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_replicaheartbeat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=100)),
+                ('path', models.CharField(max_length=255)),
+                ('trigger', models.CharField(choices=[('header', 'Staff header'), ('sampling', 'Random sampling')], max_length=10)),
+                ('duration_ms', models.FloatField()),
+                ('top_functions', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['endpoint', '-created_at'], name='core_profil_endpoin_80327d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 03:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_vendordailysales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiderStats',
+            fields=[
+                ('rider', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rider_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('claims', models.PositiveIntegerField(default=0)),
+                ('deliveries', models.PositiveIntegerField(db_index=True, default=0)),
+                ('on_time_deliveries', models.PositiveIntegerField(default=0)),
+                ('delivery_seconds', models.FloatField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('average_rating', models.FloatField(db_index=True, default=0)),
+                ('average_delivery_minutes', models.FloatField(blank=True, db_index=True, null=True)),
+                ('on_time_rate', models.FloatField(db_index=True, default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Rider stats',
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-19 03:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_orders(apps, schema_editor):
+    Order = apps.get_model('core', 'Order')
+    OrderStatusCounter = apps.get_model('core', 'OrderStatusCounter')
+    OrderStatusCounter.objects.bulk_create([
+        OrderStatusCounter(status=row['status'], zone=row['zone'], count=row['count'])
+        for row in Order.objects.values('status', 'zone').annotate(count=Count('id')).order_by()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_riderstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='zone',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='OrderStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('zone', models.CharField(blank=True, default='', max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('status', 'zone'), name='unique_status_zone')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('claimed', 'Claimed'), ('delivered', 'Delivered'), ('status_changed', 'Status changed'), ('deleted', 'Deleted')], max_length=20)),
+                ('from_status', models.CharField(blank=True, default='', max_length=20)),
+                ('to_status', models.CharField(blank=True, default='', max_length=20)),
+                ('zone', models.CharField(blank=True, default='', max_length=20)),
+                ('elapsed_seconds', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='events', to='core.order')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'created_at'], name='core_ordere_kind_0b9b87_idx'), models.Index(fields=['order', 'created_at'], name='core_ordere_order_i_f57dd5_idx')],
+            },
+        ),
+        migrations.RunPython(count_existing_orders, migrations.RunPython.noop),
+    ]
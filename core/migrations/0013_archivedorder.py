@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 03:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_order_events'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orderevent',
+            name='kind',
+            field=models.CharField(choices=[('created', 'Created'), ('claimed', 'Claimed'), ('delivered', 'Delivered'), ('status_changed', 'Status changed'), ('archived', 'Archived'), ('deleted', 'Deleted')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('product_name', models.CharField(max_length=200)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('assigned', 'Assigned to Bodaboda'), ('picked_up', 'Picked Up'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('delivery_address', models.TextField()),
+                ('zone', models.CharField(blank=True, default='', max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('delivered_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('is_delivered', models.BooleanField(default=False)),
+                ('bodaboda_rating', models.PositiveSmallIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('bodaboda', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('claimed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['customer', '-created_at'], name='core_archiv_custome_938cd1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_vendor_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_row', models.IntegerField()),
+                ('cell_col', models.IntegerField()),
+                ('score', models.FloatField(default=0)),
+                ('stamp', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('cell_row', 'cell_col'), name='unique_demand_cell')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_demandcell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpeedProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zone', models.CharField(blank=True, default='', max_length=20)),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('deliveries', models.IntegerField(default=0)),
+                ('total_km', models.FloatField(default=0)),
+                ('total_seconds', models.FloatField(default=0)),
+                ('speed_kmh', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('zone', 'hour'), name='unique_speed_zone_hour')],
+            },
+        ),
+    ]
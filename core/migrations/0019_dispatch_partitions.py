@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_speedprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='dispatch_partition',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='dispatch_partition',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='zone',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['dispatch_partition', 'status'], name='core_order_dispatc_496d88_idx'),
+        ),
+    ]
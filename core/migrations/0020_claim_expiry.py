@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_dispatch_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.CharField(max_length=50)),
+                ('started_at', models.DateTimeField()),
+                ('duration_ms', models.FloatField()),
+                ('stats', models.JSONField(default=dict)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='orderevent',
+            name='kind',
+            field=models.CharField(choices=[('created', 'Created'), ('claimed', 'Claimed'), ('delivered', 'Delivered'), ('status_changed', 'Status changed'), ('archived', 'Archived'), ('deleted', 'Deleted'), ('expired', 'Claim expired')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'claimed_at'], name='core_order_status_f5f762_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobrun',
+            index=models.Index(fields=['job', '-started_at'], name='core_jobrun_job_c9019a_idx'),
+        ),
+    ]
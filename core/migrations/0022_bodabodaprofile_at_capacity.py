@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bodabodaprofile',
+            name='at_capacity',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:19
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_product_names(apps, schema_editor):
+    Product = apps.get_model('core', 'Product')
+    VendorDailySales = apps.get_model('core', 'VendorDailySales')
+    VendorDailySales.objects.update(
+        product_name=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('name')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_bodabodaprofile_at_capacity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendordailysales',
+            name='product_name',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.RunPython(fill_product_names, migrations.RunPython.noop),
+    ]
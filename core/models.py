@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator
+from django.core.serializers.json import DjangoJSONEncoder
 
 class User(AbstractUser):
     USER_TYPE_CHOICES = (
@@ -13,6 +14,10 @@ class User(AbstractUser):
     profile_image = models.ImageField(upload_to='profiles/', blank=True, null=True)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # Riders only: zone of the last reported location and the dispatch
+    # partition owning it (see core.dispatch), set with each location update.
+    zone = models.CharField(max_length=20, blank=True, default='')
+    dispatch_partition = models.PositiveSmallIntegerField(default=0, db_index=True)
 
     def __str__(self):
         return f"{self.username} ({self.user_type})"
@@ -23,10 +28,27 @@ class VendorProfile(models.Model):
     business_name = models.CharField(max_length=100)
     license_number = models.CharField(max_length=50, blank=True, null=True)
     location_description = models.CharField(max_length=255)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Grid cell of the coordinates (utils.grid_cell), kept in step by save()
+    # so nearby-vendor lookups are an index range scan.
+    cell_row = models.IntegerField(null=True, blank=True, editable=False)
+    cell_col = models.IntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=['cell_row', 'cell_col'])]
 
     def __str__(self):
         return self.business_name
 
+    def save(self, *args, **kwargs):
+        from .utils import grid_cell
+        self.cell_row, self.cell_col = grid_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'cell_row', 'cell_col'}
+        super().save(*args, **kwargs)
+
 
 class BodabodaProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='bodaboda_profile')
@@ -34,6 +56,9 @@ class BodabodaProfile(models.Model):
     id_number = models.CharField(max_length=30)
     verified = models.BooleanField(default=False)
     is_available = models.BooleanField(default=True)
+    # Set when expire_stale_claims switched the rider off for carrying too many
+    # orders; it only ever switches these riders back on, never ones an admin did.
+    at_capacity = models.BooleanField(default=False, editable=False)
     rating = models.IntegerField(default=0)
 
     def __str__(self):
@@ -43,6 +68,7 @@ class BodabodaProfile(models.Model):
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -64,7 +90,11 @@ class Product(models.Model):
     image = models.URLField(blank=True, null=True)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
     is_available = models.BooleanField(default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['name'])]
 
     def __str__(self):
         return self.name
@@ -89,6 +119,21 @@ class Order(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    # Snapshot taken when the order is placed (see Order.snapshot), so order
+    # reads need no joins and stay correct when the product or customer changes.
+    product_name = models.CharField(max_length=200, blank=True, default='')
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    vendor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        limit_choices_to={'user_type': 'vendor'},
+        related_name='vendor_orders'
+    )
+    customer_latitude = models.FloatField(null=True, blank=True)
+    customer_longitude = models.FloatField(null=True, blank=True)
     bodaboda = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -98,7 +143,11 @@ class Order(models.Model):
         related_name='bodaboda_orders'
     )
     delivery_address = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Grid cell of the customer's location when the order was placed (see utils.zone_for),
+    # and the dispatch partition that owns it; save() keeps the two in step.
+    zone = models.CharField(max_length=20, blank=True, default='')
+    dispatch_partition = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
 
 
@@ -111,18 +160,48 @@ class Order(models.Model):
         limit_choices_to={'user_type': 'bodaboda'},
         related_name='claimed_orders'
     )
-    delivered_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True, db_index=True)
     is_delivered = models.BooleanField(default=False)
 
     # Reputation tracking
     bodaboda_rating = models.PositiveSmallIntegerField(default=0) 
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['dispatch_partition', 'status']),
+            # expire_stale_claims scans the oldest assigned claims first.
+            models.Index(fields=['status', 'claimed_at']),
+        ]
+
     def __str__(self):
         return f"Order {self.id} - {self.status}"
 
     def __str__(self):
         return f"Order {self.id} by {self.customer.username}"
 
+    @staticmethod
+    def snapshot(product, customer):
+        """The product and customer details an order placed now should remember."""
+        return {
+            'product_name': product.name,
+            'unit_price': product.price,
+            'vendor_id': product.vendor_id,
+            'customer_latitude': customer.latitude,
+            'customer_longitude': customer.longitude,
+        }
+
+    def take_snapshot(self):
+        for field, value in self.snapshot(self.product, self.customer).items():
+            setattr(self, field, value)
+
+    def save(self, *args, **kwargs):
+        from .dispatch import partition_for
+        self.dispatch_partition = partition_for(self.zone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'zone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'dispatch_partition'}
+        super().save(*args, **kwargs)
+
 
 class BodabodaDevice(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'user_type': 'bodaboda'})
@@ -131,4 +210,275 @@ class BodabodaDevice(models.Model):
     is_active = models.BooleanField(default=True)
 
     def __str__(self):
-        return f"{self.user.username} - {self.expo_token[:10]}..."
\ No newline at end of file
+        return f"{self.user.username} - {self.expo_token[:10]}..."
+
+
+class VendorDailySales(models.Model):
+    """Delivered-order totals per vendor, product and day, maintained as orders are delivered."""
+    vendor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_sales')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    # The product's name as ordered (Order.product_name), so the dashboard needn't join Product.
+    product_name = models.CharField(max_length=200, blank=True, default='')
+    day = models.DateField()
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name_plural = "Vendor daily sales"
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'day', 'product'], name='unique_vendor_day_product'),
+        ]
+
+    def __str__(self):
+        return f"{self.vendor_id} {self.day} {self.product_id}: {self.revenue}"
+
+
+class RiderStats(models.Model):
+    """Running per-rider performance totals, updated with F() expressions on each order transition."""
+    rider = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='rider_stats')
+    claims = models.PositiveIntegerField(default=0)
+    deliveries = models.PositiveIntegerField(default=0, db_index=True)
+    on_time_deliveries = models.PositiveIntegerField(default=0)
+    delivery_seconds = models.FloatField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    # Derived from the totals above in the same UPDATE, so the leaderboard can sort on an index.
+    average_rating = models.FloatField(default=0, db_index=True)
+    average_delivery_minutes = models.FloatField(null=True, blank=True, db_index=True)
+    on_time_rate = models.FloatField(default=0, db_index=True)
+
+    class Meta:
+        verbose_name_plural = "Rider stats"
+
+    def __str__(self):
+        return f"Stats for {self.rider_id}: {self.deliveries} deliveries"
+
+
+class ArchivedOrder(models.Model):
+    """
+    Delivered and cancelled orders moved out of the live Order table by the
+    archive_orders command. Keeps the original id and the order's snapshot
+    fields, so the history still reads well if the product goes away.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_orders')
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    product_name = models.CharField(max_length=200)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    vendor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    quantity = models.PositiveIntegerField(default=1)
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    bodaboda = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    delivery_address = models.TextField()
+    zone = models.CharField(max_length=20, blank=True, default='')
+    customer_latitude = models.FloatField(null=True, blank=True)
+    customer_longitude = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    is_delivered = models.BooleanField(default=False)
+    bodaboda_rating = models.PositiveSmallIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['customer', '-created_at'])]
+
+    def __str__(self):
+        return f"Archived order {self.id} - {self.status}"
+
+    @classmethod
+    def from_order(cls, order):
+        return cls(
+            id=order.id,
+            customer_id=order.customer_id,
+            product_id=order.product_id,
+            product_name=order.product_name or order.product.name,
+            unit_price=order.unit_price,
+            vendor_id=order.vendor_id,
+            quantity=order.quantity,
+            total_price=order.total_price,
+            status=order.status,
+            bodaboda_id=order.bodaboda_id,
+            claimed_by_id=order.claimed_by_id,
+            delivery_address=order.delivery_address,
+            zone=order.zone,
+            customer_latitude=order.customer_latitude,
+            customer_longitude=order.customer_longitude,
+            created_at=order.created_at,
+            claimed_at=order.claimed_at,
+            delivered_at=order.delivered_at,
+            is_delivered=order.is_delivered,
+            bodaboda_rating=order.bodaboda_rating,
+        )
+
+
+class OrderEvent(models.Model):
+    """
+    Append-only history of order transitions. The order FK has no database
+    constraint so events outlive the row they describe (e.g. after archiving).
+    """
+    KIND_CHOICES = (
+        ('created', 'Created'),
+        ('claimed', 'Claimed'),
+        ('delivered', 'Delivered'),
+        ('status_changed', 'Status changed'),
+        ('archived', 'Archived'),
+        ('deleted', 'Deleted'),
+        ('expired', 'Claim expired'),
+    )
+
+    order = models.ForeignKey(
+        Order, on_delete=models.DO_NOTHING, db_constraint=False, related_name='events'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    from_status = models.CharField(max_length=20, blank=True, default='')
+    to_status = models.CharField(max_length=20, blank=True, default='')
+    zone = models.CharField(max_length=20, blank=True, default='')
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # Seconds since the order was placed, so claim/delivery latency needs no join.
+    elapsed_seconds = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'created_at']),
+            models.Index(fields=['order', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Order {self.order_id} {self.kind} {self.from_status or '-'} -> {self.to_status or '-'}"
+
+
+class OrderStatusCounter(models.Model):
+    """Live number of orders per (status, zone), maintained with each OrderEvent."""
+    status = models.CharField(max_length=20)
+    zone = models.CharField(max_length=20, blank=True, default='')
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['status', 'zone'], name='unique_status_zone')]
+
+    def __str__(self):
+        return f"{self.status}@{self.zone or '-'}: {self.count}"
+
+
+class DemandCell(models.Model):
+    """
+    Time-decayed number of orders placed in one grid cell (see core.heatmap).
+    `score` is the decayed count as of `stamp` (Unix seconds); readers decay it
+    the rest of the way to now.
+    """
+    cell_row = models.IntegerField()
+    cell_col = models.IntegerField()
+    score = models.FloatField(default=0)
+    stamp = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['cell_row', 'cell_col'], name='unique_demand_cell')]
+
+    def __str__(self):
+        return f"{self.cell_row}:{self.cell_col} = {self.score:.2f}"
+
+
+class SpeedProfile(models.Model):
+    """
+    Effective delivery speed per (zone, local hour of the claim), learned from
+    delivered orders (see core.eta). zone '' holds the town-wide totals.
+    """
+    zone = models.CharField(max_length=20, blank=True, default='')
+    hour = models.PositiveSmallIntegerField()
+    deliveries = models.IntegerField(default=0)
+    total_km = models.FloatField(default=0)
+    total_seconds = models.FloatField(default=0)
+    # Derived from the totals in the same UPDATE, like RiderStats.
+    speed_kmh = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['zone', 'hour'], name='unique_speed_zone_hour')]
+
+    def __str__(self):
+        return f"{self.zone or 'town'} @{self.hour:02d}h: {self.speed_kmh or 0:.1f} km/h"
+
+
+class Tombstone(models.Model):
+    """Record of a deleted catalog row, so offline clients can drop it on their next delta sync."""
+    MODEL_CHOICES = (
+        ('product', 'Product'),
+        ('category', 'Category'),
+    )
+
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['deleted_at', 'model'])]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class ReplicaHeartbeat(models.Model):
+    """Single row stamped on the primary before each replica sync, used to measure lag."""
+    beat = models.DateTimeField()
+
+    def __str__(self):
+        return f"Heartbeat {self.beat:%Y-%m-%d %H:%M:%S}"
+
+
+class ProfileSample(models.Model):
+    """cProfile summary of one live request; kept as a per-endpoint ring buffer."""
+    TRIGGER_CHOICES = (
+        ('header', 'Staff header'),
+        ('sampling', 'Random sampling'),
+    )
+    endpoint = models.CharField(max_length=100)
+    path = models.CharField(max_length=255)
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    duration_ms = models.FloatField()
+    top_functions = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['endpoint', '-created_at'])]
+
+    def __str__(self):
+        return f"{self.endpoint} {self.duration_ms:.0f} ms"
+
+
+class JobRun(models.Model):
+    """Outcome and timing of one background job run; kept as a per-job ring buffer."""
+    job = models.CharField(max_length=50)
+    started_at = models.DateTimeField()
+    duration_ms = models.FloatField()
+    stats = models.JSONField(default=dict)
+
+    class Meta:
+        indexes = [models.Index(fields=['job', '-started_at'])]
+
+    def __str__(self):
+        return f"{self.job} at {self.started_at:%Y-%m-%d %H:%M:%S} ({self.duration_ms:.0f} ms)"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client's Idempotency-Key and the response its first request produced,
+    replayed to retries until expires_at. status_code is null while that first
+    request is still running.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(max_length=64)
+    fingerprint = models.CharField(max_length=32)  # blake2b of method, path and body
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'key'], name='unique_user_idempotency_key')]
+
+    def __str__(self):
+        return f"{self.key} ({self.status_code or 'in progress'})"
@@ -0,0 +1,93 @@
+# core/profiling.py
+import cProfile
+import pstats
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import ProfileSample
+
+_jwt = JWTAuthentication()
+
+
+def _is_staff(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    try:
+        authenticated = _jwt.authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return bool(authenticated and authenticated[0].is_staff)
+
+
+def top_functions(profiler, limit):
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            'function': f"{filename}:{line}({name})",
+            'calls': calls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3),
+        }
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in rows
+    ]
+
+
+def store_sample(endpoint, path, trigger, duration_ms, functions):
+    ProfileSample.objects.create(
+        endpoint=endpoint, path=path[:255], trigger=trigger,
+        duration_ms=duration_ms, top_functions=functions
+    )
+    stale = ProfileSample.objects.filter(endpoint=endpoint).order_by('-created_at').values_list(
+        'pk', flat=True
+    )[settings.PROFILING_RING_SIZE:]
+    ProfileSample.objects.filter(pk__in=list(stale)).delete()
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+    """
+    Run the view under cProfile when a staff member sends the X-Profile header
+    or when the request falls inside PROFILING_SAMPLE_RATE. Must be the last
+    middleware so every other process_view hook has already run.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.META.get('HTTP_X_PROFILE'):
+            if not _is_staff(request):
+                return None
+            trigger = 'header'
+        elif settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            trigger = 'sampling'
+        else:
+            return None
+        if iscoroutinefunction(view_func):
+            return None
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this interpreter.
+            return None
+        started = time.perf_counter()
+        try:
+            response = view_func(request, *view_args, **view_kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        finally:
+            profiler.disable()
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        match = request.resolver_match
+        store_sample(
+            match.url_name or match.route, request.get_full_path(), trigger,
+            duration_ms, top_functions(profiler, settings.PROFILING_TOP_N)
+        )
+        return response
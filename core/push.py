@@ -0,0 +1,39 @@
+from django.conf import settings
+from exponent_server_sdk import PushClient, PushMessage
+
+from .models import BodabodaDevice
+
+
+def _active_tokens(partition):
+    return BodabodaDevice.objects.filter(
+        is_active=True,
+        user__bodaboda_profile__verified=True,
+        user__dispatch_partition=partition
+    ).values_list('expo_token', flat=True)
+
+
+def _new_order_messages(order, tokens):
+    return [
+        PushMessage(
+            to=token,
+            title="New Order Available!",
+            body=f"{order.product_name} • TZS {order.total_price:,}",
+            data={"order_id": order.id},
+            sound="default"
+        )
+        for token in tokens
+        if PushClient.is_exponent_push_token(token)
+    ]
+
+
+def notify_new_order(order):
+    """Tell the verified riders in the order's dispatch partition that a new order is up for grabs."""
+    if not settings.PUSH_NOTIFICATIONS_ENABLED:
+        return
+    try:
+        messages = _new_order_messages(order, _active_tokens(order.dispatch_partition))
+        if messages:
+            PushClient().publish_multiple(messages)
+    except Exception as e:
+        print("Push notification error:", e)
+
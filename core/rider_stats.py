@@ -0,0 +1,119 @@
+# core/rider_stats.py
+"""Incrementally maintained RiderStats, one F()-expression UPDATE per order transition."""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, FloatField, Q, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .models import ArchivedOrder, Order, RiderStats
+
+
+def _ratio(numerator, denominator):
+    return Cast(numerator, FloatField()) / NullIf(denominator, 0)
+
+
+def _apply(rider_id, **changes):
+    # Right-hand sides see the row as it was before this UPDATE, so derived
+    # averages are written from the incremented totals in a single statement.
+    if RiderStats.objects.filter(rider_id=rider_id).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            RiderStats.objects.create(rider_id=rider_id)
+    except IntegrityError:
+        pass
+    RiderStats.objects.filter(rider_id=rider_id).update(**changes)
+
+
+def record_claim(rider_id):
+    _apply(rider_id, claims=F('claims') + 1)
+
+
+def record_delivery(order, sign=1):
+    """Count a delivered order for its rider; sign=-1 takes it back out."""
+    if not order.claimed_by_id:
+        return
+    seconds, on_time = 0.0, 0
+    # Without both timestamps the delivery time is unknown: not on time, as in rebuild_all().
+    if order.claimed_at and order.delivered_at:
+        seconds = max((order.delivered_at - order.claimed_at).total_seconds(), 0.0)
+        on_time = int(seconds <= settings.DELIVERY_ON_TIME_MINUTES * 60)
+    deliveries = F('deliveries') + sign
+    _apply(
+        order.claimed_by_id,
+        deliveries=deliveries,
+        on_time_deliveries=F('on_time_deliveries') + sign * on_time,
+        delivery_seconds=F('delivery_seconds') + sign * seconds,
+        average_delivery_minutes=_ratio(F('delivery_seconds') + sign * seconds, deliveries) / 60,
+        on_time_rate=Coalesce(_ratio(F('on_time_deliveries') + sign * on_time, deliveries), 0.0),
+    )
+
+
+def record_rating(rider_id, rating, previous=0):
+    """Apply a customer rating (1-5); `previous` is the rating it replaces, 0 meaning unrated."""
+    if not rider_id or rating == previous:
+        return
+    count = F('rating_count') + (bool(rating) - bool(previous))
+    total = F('rating_sum') + (rating - previous)
+    _apply(
+        rider_id,
+        rating_count=count,
+        rating_sum=total,
+        average_rating=Coalesce(_ratio(total, count), 0.0),
+    )
+
+
+def rebuild_all():
+    """Recompute every rider's stats from the order history; returns the number of riders written."""
+    delivered = Q(status='delivered')
+    window = timedelta(minutes=settings.DELIVERY_ON_TIME_MINUTES)
+    totals = defaultdict(lambda: dict.fromkeys(
+        ('claims', 'deliveries', 'on_time', 'seconds', 'rating_count', 'rating_sum'), 0
+    ))
+    # Live and archived orders both count towards a rider's history.
+    for model in (Order, ArchivedOrder):
+        rider_totals = (
+            model.objects.filter(claimed_by__isnull=False)
+            .values('claimed_by_id')
+            .annotate(
+                claims=Count('id'),
+                deliveries=Count('id', filter=delivered),
+                on_time=Count('id', filter=delivered & Q(delivered_at__lte=F('claimed_at') + window)),
+                duration=Sum(
+                    ExpressionWrapper(F('delivered_at') - F('claimed_at'), output_field=DurationField()),
+                    filter=delivered & Q(claimed_at__isnull=False, delivered_at__isnull=False),
+                ),
+                rating_count=Count('id', filter=Q(bodaboda_rating__gt=0)),
+                rating_sum=Sum('bodaboda_rating', filter=Q(bodaboda_rating__gt=0)),
+            )
+            .order_by()
+        )
+        for row in rider_totals:
+            total = totals[row['claimed_by_id']]
+            row['seconds'] = row['duration'].total_seconds() if row['duration'] else 0.0
+            row['rating_sum'] = row['rating_sum'] or 0
+            for field in total:
+                total[field] += row[field]
+
+    rows = []
+    for rider_id, total in totals.items():
+        deliveries, rating_count = total['deliveries'], total['rating_count']
+        rows.append(RiderStats(
+            rider_id=rider_id,
+            claims=total['claims'],
+            deliveries=deliveries,
+            on_time_deliveries=total['on_time'],
+            delivery_seconds=total['seconds'],
+            rating_count=rating_count,
+            rating_sum=total['rating_sum'],
+            average_rating=total['rating_sum'] / rating_count if rating_count else 0.0,
+            average_delivery_minutes=total['seconds'] / deliveries / 60 if deliveries else None,
+            on_time_rate=total['on_time'] / deliveries if deliveries else 0.0,
+        ))
+    with transaction.atomic():
+        RiderStats.objects.all().delete()
+        RiderStats.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
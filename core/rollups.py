@@ -0,0 +1,75 @@
+# core/rollups.py
+"""Incrementally maintained vendor sales rollups (VendorDailySales)."""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+
+from .models import ArchivedOrder, Order, VendorDailySales
+
+
+def record_delivery(order, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) a delivered order from its vendor's rollup
+    for the delivery day. Call it in the same transaction as the status change.
+    """
+    key = {
+        # Orders placed before snapshots were backfilled have no vendor_id yet.
+        'vendor_id': order.vendor_id or order.product.vendor_id,
+        'product_id': order.product_id,
+        'day': timezone.localdate(order.delivered_at),
+    }
+    changes = {
+        'orders': F('orders') + sign,
+        'units': F('units') + sign * order.quantity,
+        'revenue': F('revenue') + sign * order.total_price,
+    }
+    if VendorDailySales.objects.filter(**key).update(**changes) or sign < 0:
+        return
+    try:
+        with transaction.atomic():
+            VendorDailySales.objects.create(
+                **key, product_name=order.product_name or order.product.name,
+                orders=1, units=order.quantity, revenue=order.total_price
+            )
+    except IntegrityError:
+        # Another delivery created the row first; add to it instead.
+        VendorDailySales.objects.filter(**key).update(**changes)
+
+
+def rebuild_day(day):
+    """Recompute one day's rollups from the delivered orders; returns the number of rows written."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    totals = defaultdict(lambda: {'product_name': '', 'orders': 0, 'units': 0, 'revenue': 0})
+    # Old days may be split between the live table and the archive.
+    for model in (Order, ArchivedOrder):
+        day_totals = (
+            model.objects.filter(status='delivered', delivered_at__gte=start, delivered_at__lt=end)
+            # The same key record_delivery() uses: the order's snapshot vendor, else the product's.
+            .values(rollup_vendor_id=Coalesce('vendor_id', 'product__vendor_id'), rollup_product_id=F('product_id'))
+            .annotate(
+                product_name=Max(Coalesce(NullIf('product_name', Value('')), 'product__name')),
+                orders=Count('id'), units=Sum('quantity'), revenue=Sum('total_price')
+            )
+            .order_by()
+        )
+        for row in day_totals:
+            if row['rollup_vendor_id'] is None or row['rollup_product_id'] is None:
+                # Archived orders whose product is gone; its rollup rows went with it (CASCADE).
+                continue
+            total = totals[(row['rollup_vendor_id'], row['rollup_product_id'])]
+            for field in ('orders', 'units', 'revenue'):
+                total[field] += row[field]
+            total['product_name'] = max(total['product_name'], row['product_name'])
+    rows = [
+        VendorDailySales(vendor_id=vendor_id, product_id=product_id, day=day, **total)
+        for (vendor_id, product_id), total in totals.items()
+    ]
+    with transaction.atomic():
+        VendorDailySales.objects.filter(day=day).delete()
+        VendorDailySales.objects.bulk_create(rows)
+    return len(rows)
@@ -0,0 +1,79 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+REPLICA = 'replica'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_freshness = {'checked_at': 0.0, 'fresh': False}
+
+
+@contextmanager
+def replica_reads():
+    """Route reads made inside the block to the replica while it is fresh enough."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def read_alias(model):
+    """
+    The database replica_reads() would send reads of `model` to right now. For
+    generators, which must not hold the context open across yields: resolve it
+    once and pin the queryset with .using().
+    """
+    from django.db import router
+
+    with replica_reads():
+        return router.db_for_read(model)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def replica_lag():
+    """Seconds since the last heartbeat that reached the replica, or None if unknown."""
+    from .models import ReplicaHeartbeat
+
+    try:
+        beat = ReplicaHeartbeat.objects.using(REPLICA).values_list('beat', flat=True).first()
+    except DatabaseError:
+        return None
+    if beat is None:
+        return None
+    return (timezone.now() - beat).total_seconds()
+
+
+def replica_is_fresh():
+    now = time.monotonic()
+    if now - _freshness['checked_at'] >= settings.REPLICA_LAG_CHECK_INTERVAL:
+        lag = replica_lag()
+        _freshness['fresh'] = lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+        _freshness['checked_at'] = now
+    return _freshness['fresh']
+
+
+class PrimaryReplicaRouter:
+    """Send opted-in reads to the replica; everything else stays on the primary."""
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and replica_configured() and replica_is_fresh():
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary file and gets its schema from sync_replica.
+        return db != REPLICA
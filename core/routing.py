@@ -0,0 +1,147 @@
+# core/routing.py
+"""
+Multi-drop route planning for riders carrying several orders.
+
+A route starts at the rider and visits every pickup and drop-off once, never
+dropping an order off before it has been picked up. plan_route() builds a
+nearest-neighbour tour and improves it with 2-opt and single-stop relocation
+until no move helps or the time budget runs out, so it always answers in
+bounded time.
+"""
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from .utils import haversine_distance
+
+Stop = namedtuple('Stop', 'order_id kind latitude longitude')
+
+# ~1 m of precision; lets the leg cache hit across requests for the same points.
+_COORD_DIGITS = 5
+
+
+@lru_cache(maxsize=65536)
+def _leg_km(a, b):
+    return haversine_distance(a[0], a[1], b[0], b[1])
+
+
+def leg_km(a, b):
+    """Cached great-circle distance between two (lat, lng) points."""
+    a = (round(a[0], _COORD_DIGITS), round(a[1], _COORD_DIGITS))
+    b = (round(b[0], _COORD_DIGITS), round(b[1], _COORD_DIGITS))
+    return _leg_km(a, b) if a <= b else _leg_km(b, a)
+
+
+def _route_km(route, matrix):
+    return sum(matrix[a][b] for a, b in zip(route, route[1:]))
+
+
+def _nearest_neighbour(matrix, stops):
+    """Greedy tour from the start (index 0) over the currently reachable stops."""
+    picked = {stop.order_id for stop in stops if stop.kind == 'dropoff'} - {
+        stop.order_id for stop in stops if stop.kind == 'pickup'
+    }
+    remaining = set(range(1, len(stops) + 1))
+    route = [0]
+    while remaining:
+        here = route[-1]
+        reachable = [i for i in remaining if stops[i - 1].kind == 'pickup' or stops[i - 1].order_id in picked]
+        nearest = min(reachable, key=lambda i: (matrix[here][i], i))
+        remaining.discard(nearest)
+        route.append(nearest)
+        if stops[nearest - 1].kind == 'pickup':
+            picked.add(stops[nearest - 1].order_id)
+    return route
+
+
+def _two_opt(route, matrix, stops, deadline):
+    """
+    Reverse segments while that shortens the open path. Reversing a segment
+    only breaks precedence when it holds both ends of the same order, so such
+    moves are skipped. Returns None when the deadline passed.
+    """
+    last = len(route) - 1
+    improved = False
+    for i in range(1, last):
+        if time.perf_counter() > deadline:
+            return None
+        inside = set()
+        for j in range(i, last + 1):
+            order_id = stops[route[j] - 1].order_id
+            if order_id in inside:
+                break  # every longer segment holds this pickup and drop-off too
+            inside.add(order_id)
+            if j == i:
+                continue
+            before, after = route[i - 1], route[j + 1] if j < last else None
+            delta = matrix[before][route[j]] - matrix[before][route[i]]
+            if after is not None:
+                delta += matrix[route[i]][after] - matrix[route[j]][after]
+            if delta < -1e-9:
+                route[i:j + 1] = reversed(route[i:j + 1])
+                improved = True
+                inside = {stops[route[k] - 1].order_id for k in range(i, j + 1)}
+    return improved
+
+
+def _relocate(route, matrix, stops, deadline):
+    """
+    Move single stops to a cheaper position, keeping each pickup ahead of its
+    drop-off. Catches what 2-opt cannot, such as a drop-off that sits between
+    two far-apart pickups. Returns None when the deadline passed.
+    """
+    partner = {}
+    for index, stop in enumerate(stops, start=1):
+        partner.setdefault(stop.order_id, []).append(index)
+    improved = False
+    i = 1
+    while i < len(route):
+        if time.perf_counter() > deadline:
+            return None
+        node = route[i]
+        prev, nxt = route[i - 1], route[i + 1] if i + 1 < len(route) else None
+        removed = matrix[prev][node] - (matrix[prev][nxt] - matrix[node][nxt] if nxt is not None else 0)
+        rest = route[:i] + route[i + 1:]
+        # Allowed insertion slots lie after the pickup (for a drop-off) or before the drop-off (for a pickup).
+        other = [rest.index(n) for n in partner[stops[node - 1].order_id] if n != node]
+        low, high = 1, len(rest)
+        if other:
+            if stops[node - 1].kind == 'dropoff':
+                low = other[0] + 1
+            else:
+                high = other[0]
+        best, best_gain = None, 1e-9
+        for k in range(low, high + 1):
+            a, b = rest[k - 1], rest[k] if k < len(rest) else None
+            added = matrix[a][node] + (matrix[node][b] - matrix[a][b] if b is not None else 0)
+            if removed - added > best_gain:
+                best, best_gain = k, removed - added
+        if best is not None:
+            rest.insert(best, node)
+            route[:] = rest
+            improved = True
+        i += 1
+    return improved
+
+
+def plan_route(start, stops, budget_ms):
+    """
+    Order `stops` (a list of Stop) into a short route from `start` (lat, lng).
+
+    Returns (ordered stops, leg distances in km, total km, converged) where
+    `converged` is False when the local search was cut short by the budget.
+    """
+    deadline = time.perf_counter() + budget_ms / 1000
+    points = [start] + [(stop.latitude, stop.longitude) for stop in stops]
+    matrix = [[leg_km(a, b) for b in points] for a in points]
+
+    route = _nearest_neighbour(matrix, stops)
+    converged = False
+    while not converged:
+        reversed_any = _two_opt(route, matrix, stops, deadline)
+        moved_any = reversed_any is not None and _relocate(route, matrix, stops, deadline)
+        if reversed_any is None or moved_any is None:
+            break
+        converged = not (reversed_any or moved_any)
+    legs = [matrix[a][b] for a, b in zip(route, route[1:])]
+    return [stops[i - 1] for i in route[1:]], legs, _route_km(route, matrix), converged
@@ -4,7 +4,84 @@ from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
-from .models import User, VendorProfile, BodabodaProfile, Product, Category, Order
+from . import metrics
+from .models import User, VendorProfile, BodabodaProfile, Product, Category, Order, ArchivedOrder
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with metrics.span('serialize'):
+            return super().data
+
+
+def requested_fields(request):
+    """Field names from ?fields=a,b on a GET request, or None for the full representation."""
+    if request is None or request.method != 'GET':
+        return None
+    value = getattr(request, 'query_params', request.GET).get('fields')
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Honour ?fields=a,b on GET requests by dropping every other field ('id' is
+    always kept). Unknown names are ignored. `sparse_sources` lists the model
+    fields a SerializerMethodField reads, for sparse_queryset().
+    """
+    sparse_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = requested_fields(self.context.get('request'))
+        if wanted:
+            for name in set(self.fields) - wanted - {'id'}:
+                self.fields.pop(name)
+
+    @classmethod
+    def projection(cls, wanted):
+        """The .only() and .select_related() lookups behind the wanted fields, or None if it needs the row."""
+        only, related = {'id'}, set()
+        for name, field in cls().fields.items():
+            if name not in wanted:
+                continue
+            for source in cls.sparse_sources.get(name, [field.source]):
+                if source == '*':
+                    return None
+                parts = source.split('.')
+                only.add('__'.join(parts))
+                related.update('__'.join(parts[:depth]) for depth in range(1, len(parts)))
+        return only, related
+
+
+def sparse_queryset(queryset, serializer_class, request, always=()):
+    """
+    Narrow the SQL projection to the columns behind ?fields=, when the
+    serializer supports it, plus `always` (fields the view itself reads).
+    """
+    wanted = requested_fields(request)
+    if not wanted or not issubclass(serializer_class, SparseFieldsMixin):
+        return queryset
+    projection = serializer_class.projection(wanted)
+    if projection is None:
+        return queryset
+    only, related = projection
+    # Drop the view's own joins: only() can't defer a relation it traverses.
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*only, *always)
+
+
+class TimedSerializerMixin:
+    """Count representation time towards the request's `ser` Server-Timing span."""
+
+    @property
+    def data(self):
+        with metrics.span('serialize'):
+            return super().data
 
 
 class RegisterCustomerSerializer(serializers.ModelSerializer):
@@ -81,19 +158,20 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     vendor_name = serializers.CharField(source='vendor.vendor_profile.business_name', read_only=True)
     vendor_image = serializers.ImageField(source='vendor.profile_image', read_only=True)
 
     class Meta:
         model = Product
         fields = ['id', 'name', 'description', 'price', 'image', 'category', 'vendor_name', 'vendor_image']
+        list_serializer_class = TimedListSerializer
 
 
 # core/serializers.py
-class OrderSerializer(serializers.ModelSerializer):
-    product_name = serializers.CharField(source='product.name', read_only=True)
+class OrderSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     customer_location_available = serializers.SerializerMethodField()
+    sparse_sources = {'customer_location_available': ['customer_latitude', 'customer_longitude']}
 
     class Meta:
         model = Order
@@ -101,21 +179,42 @@ class OrderSerializer(serializers.ModelSerializer):
             'id', 'customer', 'product', 'quantity', 'total_price', 'status',
             'bodaboda', 'delivery_address', 'created_at', 'delivered_at',
             'claimed_at', 'claimed_by', 'is_delivered',
-            'product_name', 'customer_location_available'
+            'product_name', 'unit_price', 'vendor', 'customer_location_available'
         ]
+        list_serializer_class = TimedListSerializer
         extra_kwargs = {
             'customer': {'read_only': True}, 
             'bodaboda': {'read_only': True}, 
             'total_price': {'read_only': True}, 
             'status': {'read_only': True}, 
+            'product_name': {'read_only': True},
+            'unit_price': {'read_only': True},
+            'vendor': {'read_only': True},
             'product': {'required': True},
             'quantity': {'required': True},
             'delivery_address': {'required': True, 'write_only': False},
         }
 
     def get_customer_location_available(self, obj):
-        return bool(obj.customer and obj.customer.latitude and obj.customer.longitude)
-class CategorySerializer(serializers.ModelSerializer):
+        return obj.customer_latitude is not None and obj.customer_longitude is not None
+
+
+class ArchivedOrderSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
+    """Read-only twin of OrderSerializer, so archived orders look the same to clients."""
+    customer_location_available = serializers.SerializerMethodField()
+    sparse_sources = OrderSerializer.sparse_sources
+
+    class Meta:
+        model = ArchivedOrder
+        fields = OrderSerializer.Meta.fields
+        read_only_fields = fields
+        list_serializer_class = TimedListSerializer
+
+    get_customer_location_available = OrderSerializer.get_customer_location_available
+
+
+class CategorySerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug']
\ No newline at end of file
+        fields = ['id', 'name', 'slug']
+        list_serializer_class = TimedListSerializer
\ No newline at end of file
@@ -0,0 +1,92 @@
+# core/sync.py
+"""
+Delta sync for the offline-first catalog: products and categories changed
+since a cursor, plus tombstones for the ones deleted.
+
+The cursor is the server time (microseconds since the epoch) when the last
+sync ran, minus SYNC_CURSOR_OVERLAP_SECONDS. updated_at is stamped before
+the writing transaction commits, so the overlap covers a row committed just
+after a sync read past it. Clients upsert by id, and a change may arrive twice.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Category, Product, Tombstone, User, VendorProfile
+
+DELETED_KEYS = {'product': 'products', 'category': 'categories'}
+
+
+def encode_cursor(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_cursor(value):
+    """Parse a cursor from the client; raises ValueError if it is not one of ours."""
+    try:
+        return datetime.fromtimestamp(int(value) / 1_000_000, tz=dt_timezone.utc)
+    except (OverflowError, OSError) as error:
+        # Past the platform's time_t or datetime's year range.
+        raise ValueError(f"cursor out of range: {value}") from error
+
+
+def changes(since=None):
+    """
+    Everything a client holding `since` needs. Without a cursor, or with one
+    older than the tombstone retention window, returns a full snapshot.
+    """
+    now = timezone.now()
+    horizon = now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    full = since is None or since < horizon
+
+    products = Product.objects.select_related('vendor__vendor_profile').order_by('id')
+    categories = Category.objects.order_by('id')
+    deleted = {'products': [], 'categories': []}
+    if full:
+        products = products.filter(is_available=True)
+    else:
+        products = products.filter(updated_at__gt=since)
+        categories = categories.filter(updated_at__gt=since)
+        for model, object_id in Tombstone.objects.filter(deleted_at__gt=since).values_list('model', 'object_id'):
+            deleted[DELETED_KEYS[model]].append(object_id)
+
+    products = list(products)
+    # Products taken off sale disappear from the app just like deleted ones.
+    deleted['products'] += [product.id for product in products if not product.is_available]
+    return {
+        'cursor': encode_cursor(now - timedelta(seconds=settings.SYNC_CURSOR_OVERLAP_SECONDS)),
+        'full': full,
+        'products': [product for product in products if product.is_available],
+        'categories': list(categories),
+        'deleted': deleted,
+    }
+
+
+def record_tombstone(sender, instance, **kwargs):
+    """post_delete receiver for Product and Category; connected in CoreConfig.ready()."""
+    Tombstone.objects.create(model=sender._meta.model_name, object_id=instance.pk)
+
+
+def touch_category_products(sender, instance, **kwargs):
+    """pre_delete receiver for Category: its products lose their category without a save()."""
+    Product.objects.filter(category=instance).update(updated_at=timezone.now())
+
+
+# The vendor fields ProductSerializer sends along with each product.
+VENDOR_FIELDS = {VendorProfile: ('business_name', 'user_id'), User: ('profile_image', 'pk')}
+
+
+def touch_vendor_products(sender, instance, update_fields=None, **kwargs):
+    """
+    pre_save receiver for VendorProfile and User: a vendor renaming their
+    business or changing their picture re-sends their products.
+    """
+    field, vendor_attr = VENDOR_FIELDS[sender]
+    if instance.pk is None or (update_fields is not None and field not in update_fields):
+        return
+    if sender is User and instance.user_type != 'vendor':
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    if (previous or '') != str(getattr(instance, field) or ''):
+        Product.objects.filter(vendor_id=getattr(instance, vendor_attr)).update(updated_at=timezone.now())
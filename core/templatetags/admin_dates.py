@@ -0,0 +1,73 @@
+import copy
+import datetime
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.db.models import Max, Min
+from django.utils import timezone
+
+register = template.Library()
+
+
+def _next_period(start, kind):
+    if kind == 'year':
+        return start.replace(year=start.year + 1)
+    if kind == 'month':
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start + datetime.timedelta(days=1)
+
+
+class IndexProbingDates:
+    """
+    Stand-in for the changelist queryset in the date hierarchy. Instead of
+    SELECT DISTINCT over a truncated column (a full scan), list the periods
+    between MIN and MAX and keep those where an indexed range probe finds a row.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def aggregate(self, **aggregates):
+        # One aggregate per query: SQLite only answers a lone MIN()/MAX() from the index.
+        return {
+            name: self.queryset.aggregate(**{name: expression})[name]
+            for name, expression in aggregates.items()
+        }
+
+    def datetimes(self, field_name, kind):
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds['first'] is None:
+            return []
+        first, last = (timezone.localtime(value) for value in (bounds['first'], bounds['last']))
+        start = first.replace(hour=0, minute=0, second=0, microsecond=0, day=1 if kind != 'day' else first.day)
+        if kind == 'year':
+            start = start.replace(month=1)
+
+        periods = []
+        while start <= last:
+            end = _next_period(start, kind)
+            if self.queryset.filter(**{f'{field_name}__gte': start, f'{field_name}__lt': end}).exists():
+                periods.append(start)
+            start = end
+        return periods
+
+    def dates(self, field_name, kind):
+        return [value.date() for value in self.datetimes(field_name, kind)]
+
+
+def indexed_date_hierarchy(cl):
+    cl = copy.copy(cl)
+    cl.queryset = IndexProbingDates(cl.queryset)
+    return date_hierarchy(cl)
+
+
+@register.tag(name='indexed_date_hierarchy')
+def indexed_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=indexed_date_hierarchy,
+        template_name='date_hierarchy.html',
+        takes_context=False,
+    )
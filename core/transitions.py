@@ -0,0 +1,161 @@
+# core/transitions.py
+"""
+Every order state change goes through here: it appends an OrderEvent, moves
+the (status, zone) counters and updates the derived tables (vendor sales
+rollups, rider stats, demand heatmap, ETA speed profiles). Callers run these
+inside their own transaction so the order row and everything derived from it
+commit together.
+"""
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import eta, heatmap, rider_stats, rollups
+from .models import Order, OrderEvent, OrderStatusCounter
+
+
+def _bump(status, zone, delta):
+    counters = OrderStatusCounter.objects.filter(status=status, zone=zone)
+    if counters.update(count=F('count') + delta, updated_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            OrderStatusCounter.objects.create(status=status, zone=zone)
+    except IntegrityError:
+        pass
+    counters.update(count=F('count') + delta, updated_at=timezone.now())
+
+
+def record_event(order, kind, from_status='', to_status='', actor=None):
+    now = timezone.now()
+    OrderEvent.objects.create(
+        order_id=order.pk,
+        kind=kind,
+        from_status=from_status,
+        to_status=to_status,
+        zone=order.zone,
+        actor=actor,
+        elapsed_seconds=(now - order.created_at).total_seconds() if order.created_at else None,
+    )
+    if from_status:
+        _bump(from_status, order.zone, -1)
+    if to_status:
+        _bump(to_status, order.zone, 1)
+
+
+def order_created(order, actor=None):
+    record_event(order, 'created', to_status=order.status, actor=actor)
+    heatmap.record_demand(order.customer_latitude, order.customer_longitude)
+
+
+def order_claimed(order, rider, from_status='pending'):
+    record_event(order, 'claimed', from_status, order.status, actor=rider)
+    rider_stats.record_claim(rider.id)
+
+
+def order_delivered(order, from_status, actor=None):
+    record_event(order, 'delivered', from_status, 'delivered', actor=actor)
+    rollups.record_delivery(order)
+    rider_stats.record_delivery(order)
+    eta.record_delivery(order)
+
+
+def order_changed(previous, order, actor=None):
+    """Reconcile an arbitrary edit (the admin form) against the order as it was before, or None if new."""
+    if previous is None:
+        order_created(order, actor=actor)
+        if order.claimed_by_id:
+            rider_stats.record_claim(order.claimed_by_id)
+        if order.status == 'delivered':
+            rollups.record_delivery(order)
+            rider_stats.record_delivery(order)
+            eta.record_delivery(order)
+        rider_stats.record_rating(order.claimed_by_id, order.bodaboda_rating)
+        return
+
+    claimed = order.claimed_by_id and order.claimed_by_id != previous.claimed_by_id
+    if claimed:
+        rider_stats.record_claim(order.claimed_by_id)
+
+    if previous.status != order.status:
+        if order.status == 'delivered':
+            order_delivered(order, previous.status, actor=actor)
+        else:
+            kind = 'claimed' if claimed and order.status == 'assigned' else 'status_changed'
+            record_event(order, kind, previous.status, order.status, actor=actor)
+            if previous.status == 'delivered':
+                rollups.record_delivery(previous, sign=-1)
+                rider_stats.record_delivery(previous, sign=-1)
+                eta.record_delivery(previous, sign=-1)
+
+    if previous.bodaboda_rating != order.bodaboda_rating:
+        rider_stats.record_rating(previous.claimed_by_id, 0, previous.bodaboda_rating)
+        rider_stats.record_rating(order.claimed_by_id, order.bodaboda_rating)
+
+
+def order_deleted(order, actor=None):
+    record_event(order, 'deleted', from_status=order.status, actor=actor)
+
+
+def orders_archived(orders):
+    """Log a batch of orders leaving the live table and take them off the counters."""
+    now = timezone.now()
+    OrderEvent.objects.bulk_create([
+        OrderEvent(
+            order_id=order.pk, kind='archived', from_status=order.status, zone=order.zone,
+            elapsed_seconds=(now - order.created_at).total_seconds()
+        )
+        for order in orders
+    ])
+    for (status, zone), count in Counter((order.status, order.zone) for order in orders).items():
+        _bump(status, zone, -count)
+
+
+def claims_expired(orders):
+    """Log a batch of stale claims released back to pending and move them on the counters."""
+    now = timezone.now()
+    OrderEvent.objects.bulk_create([
+        OrderEvent(
+            order_id=order.pk, kind='expired', from_status='assigned', to_status='pending', zone=order.zone,
+            actor_id=order.claimed_by_id, elapsed_seconds=(now - order.created_at).total_seconds()
+        )
+        for order in orders
+    ])
+    for zone, count in Counter(order.zone for order in orders).items():
+        _bump('assigned', zone, -count)
+        _bump('pending', zone, count)
+
+
+def claim(order_id, rider):
+    """
+    Claim a pending order for `rider`. A single conditional UPDATE replaces the
+    read-check-write: exactly one concurrent claimer can match claimed_by IS NULL.
+    Returns True if this rider got the order.
+    """
+    with transaction.atomic():
+        claimed = Order.objects.filter(
+            id=order_id,
+            status='pending',
+            claimed_by__isnull=True
+        ).update(claimed_by=rider, claimed_at=timezone.now(), status='assigned')
+        if claimed:
+            order_claimed(Order.objects.only('id', 'status', 'zone', 'created_at').get(id=order_id), rider)
+    return bool(claimed)
+
+
+aclaim = sync_to_async(claim)
+
+
+def rebuild_counters():
+    """Recount the live orders per (status, zone); returns the number of counters written."""
+    rows = [
+        OrderStatusCounter(status=row['status'], zone=row['zone'], count=row['count'])
+        for row in Order.objects.values('status', 'zone').annotate(count=Count('id')).order_by()
+    ]
+    with transaction.atomic():
+        OrderStatusCounter.objects.all().delete()
+        OrderStatusCounter.objects.bulk_create(rows)
+    return len(rows)
@@ -1,37 +1,63 @@
 # core/urls.py
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     # Auth
-    path('auth/register/customer/', views.RegisterCustomerView.as_view()),
-    path('auth/register/vendor/', views.RegisterVendorView.as_view()),
-    path('auth/register/bodaboda/', views.RegisterBodabodaView.as_view()),
-    path('auth/login/', views.LoginView.as_view()),
+    path('auth/register/customer/', views.RegisterCustomerView.as_view(), name='register-customer'),
+    path('auth/register/vendor/', views.RegisterVendorView.as_view(), name='register-vendor'),
+    path('auth/register/bodaboda/', views.RegisterBodabodaView.as_view(), name='register-bodaboda'),
+    path('auth/login/', views.LoginView.as_view(), name='login'),
     path('auth/user/', views.user_profile, name='user-profile'),
 
+    # Multiplexed GETs
+    path('batch/', views.batch_requests, name='batch'),
+
     # Products
-    path('products/', views.ProductListView.as_view()),
+    path('products/', views.ProductListView.as_view(), name='product-list'),
+    path('products/nearby/', views.products_near_me, name='products-nearby'),
     path('products/<int:pk>/', views.ProductDetailView.as_view(), name='product-detail'),
-    path('my-products/', views.VendorProductListView.as_view()),
+    path('my-products/', views.VendorProductListView.as_view(), name='vendor-products'),
+    path('vendor/dashboard/', views.vendor_dashboard, name='vendor-dashboard'),
+    path('vendor/location/', views.update_vendor_location, name='vendor-location'),
 
     # Categories
-    path('categories/', views.CategoryListView.as_view()),
+    path('categories/', views.CategoryListView.as_view(), name='category-list'),
+
+    # Offline catalog sync
+    path('sync/changes/', views.catalog_changes, name='catalog-changes'),
 
     # Orders
-    path('orders/', views.OrderCreateView.as_view()),
-    path('my-orders/', views.CustomerOrderListView.as_view()),
+    path('orders/', views.OrderCreateView.as_view(), name='order-create'),
+    path('my-orders/', views.CustomerOrderListView.as_view(), name='customer-orders'),
+    path('orders/<int:order_id>/rate/', views.rate_delivery, name='rate-delivery'),
+    path('orders/<int:order_id>/eta/', views.order_eta, name='order-eta'),
 
     # Bodaboda
     path('bodaboda/orders/nearby/', views.nearby_orders, name='nearby-orders'),
     path('bodaboda/my-orders/', views.my_claimed_orders, name='my-claimed-orders'),
+    path('bodaboda/route/', views.plan_delivery_route, name='plan-delivery-route'),
+    path('bodaboda/heatmap/', views.demand_heatmap, name='demand-heatmap'),
     path('bodaboda/order/<int:order_id>/claim/', views.claim_order, name='claim-order'),
     path('bodaboda/order/<int:order_id>/complete/', views.complete_delivery, name='complete-delivery'),
     path('bodaboda/order/<int:order_id>/customer-phone/', views.get_customer_phone, name='customer-phone'),
     path('bodaboda/order/<int:order_id>/', views.get_bodaboda_order_detail, name='bodaboda-order-detail'),
+    path('bodaboda/leaderboard/', views.rider_leaderboard, name='rider-leaderboard'),
 
     # Location
     path('location/update/', views.update_location, name='update-location'),
 
     path('bodaboda/device-token/', views.save_device_token, name='save-device-token'),
+
+    # Native async rider endpoints (serve under ASGI)
+    path('async/location/update/', async_views.update_location, name='async-update-location'),
+    path('async/bodaboda/orders/nearby/', async_views.nearby_orders, name='async-nearby-orders'),
+    path('async/bodaboda/order/<int:order_id>/claim/', async_views.claim_order, name='async-claim-order'),
+    path('async/bodaboda/device-token/', async_views.save_device_token, name='async-save-device-token'),
+
+    # Ops
+    path('ops/perf/', views.performance_report, name='performance-report'),
+    path('ops/orders/export/', views.export_orders, name='export-orders'),
+    path('ops/orders/counters/', views.order_counters, name='order-counters'),
+    path('ops/jobs/', views.job_runs, name='job-runs'),
 ]
\ No newline at end of file
@@ -1,6 +1,11 @@
-from math import radians, sin, cos, sqrt, atan2
-from django.db import models
-from .models import User
+from math import ceil, floor, isfinite, radians, sin, cos, sqrt, atan2
+from django.conf import settings
+from django.db import connections, models
+from django.db.models import F
+from django.db.models.functions import Abs, Greatest
+from .models import User, VendorProfile
+
+KM_PER_DEGREE = 111.32
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     """Calculate distance between two points in kilometers."""
@@ -14,6 +19,24 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * atan2(sqrt(a), sqrt(1-a))
     return R * c
 
+def grid_cell(lat, lng, size=None):
+    """(row, col) of the grid cell (default ZONE_CELL_DEGREES) holding a coordinate, or (None, None)."""
+    if lat is None or lng is None:
+        return None, None
+    size = size or settings.ZONE_CELL_DEGREES
+    return floor(lat / size), floor(lng / size)
+
+def zone_for(lat, lng):
+    """Grid cell id ("row:col") for a coordinate, or '' when the location is unknown."""
+    if lat is None or lng is None:
+        return ''
+    return "%d:%d" % grid_cell(lat, lng)
+
+def valid_coordinates(lat, lng):
+    """True for a finite latitude within ±90 and longitude within ±180."""
+    return isfinite(lat) and isfinite(lng) and -90 <= lat <= 90 and -180 <= lng <= 180
+
+
 def find_nearest_bodaboda(customer_lat, customer_lng):
     """Return the nearest available & verified bodaboda user."""
     candidates = User.objects.filter(
@@ -32,4 +55,72 @@ def find_nearest_bodaboda(customer_lat, customer_lng):
         dist = haversine_distance(customer_lat, customer_lng, boda.latitude, boda.longitude)
         bodabodas.append((dist, boda))
         nearest = min(bodabodas, key=lambda x: x[0])
-    return nearest[1]
\ No newline at end of file
+    return nearest[1]
+
+
+def nearby_vendors(lat, lng, radius_km, limit):
+    """
+    [(distance_km, vendor_user_id), ...] for the closest located vendors within
+    radius_km, nearest first. Searches squares of grid cells that double in
+    size until `limit` vendors are known to be the closest, so the work tracks
+    local vendor density rather than the total number of vendors.
+    """
+    size = settings.ZONE_CELL_DEGREES
+    row, col = grid_cell(lat, lng)
+    # A cell is narrower east-west than north-south away from the equator.
+    cell_km = size * KM_PER_DEGREE * cos(radians(lat))
+    max_rings = max(1, ceil(radius_km / cell_km))
+    ring = Greatest(Abs(F('cell_row') - row), Abs(F('cell_col') - col))
+    rings = 1
+    while True:
+        # Innermost rings first, so a scan cut off at the limit keeps the closest vendors.
+        candidates = list(VendorProfile.objects.filter(
+            cell_row__range=(row - rings, row + rings),
+            cell_col__range=(col - rings, col + rings),
+        ).annotate(ring=ring).order_by('ring').values_list(
+            'user_id', 'latitude', 'longitude', 'ring'
+        )[:settings.NEARBY_VENDOR_SCAN_LIMIT])
+        truncated = len(candidates) >= settings.NEARBY_VENDOR_SCAN_LIMIT
+        if truncated:
+            # The last ring may be cut short; rank only the rings seen in full.
+            last_ring = candidates[-1][3]
+            candidates = [candidate for candidate in candidates if candidate[3] < last_ring] or candidates
+        found = []
+        for user_id, vendor_lat, vendor_lng, _ in candidates:
+            distance = haversine_distance(lat, lng, vendor_lat, vendor_lng)
+            if distance <= radius_km:
+                found.append((distance, user_id))
+        found.sort()
+        # Everything within `rings` cells of the centre cell has been seen.
+        complete = [pair for pair in found if pair[0] <= rings * cell_km]
+        if len(complete) >= limit or rings >= max_rings or truncated:
+            return found[:limit]
+        rings = min(rings * 2, max_rings)
+
+
+def estimated_row_count(model, using='default'):
+    """
+    The table's row count as of the last ANALYZE (SQLite's sqlite_stat1), or
+    None when there are no statistics for it.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+        if cursor.fetchone() is None:
+            return None
+        # Each row's stat starts with the table's row count, whichever index it describes.
+        cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [model._meta.db_table])
+        row = cursor.fetchone()
+    return int(row[0].split()[0]) if row else None
+
+
+def refresh_row_estimates(*models, using='default'):
+    """Re-ANALYZE tables after bulk moves so estimated_row_count() follows them."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f'ANALYZE "{model._meta.db_table}"')
@@ -1,18 +1,35 @@
 # core/views.py
+import heapq
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Avg, Count, Max, Sum
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.decorators import method_decorator
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated, BasePermission
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated, BasePermission
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.parsers import MultiPartParser, FormParser
-from exponent_server_sdk import PushClient, PushMessage
 from .models import BodabodaDevice
 
 import cloudinary.uploader
-from .models import Product, Category, Order, User
+from . import metrics
+from .exports import EXPORT_FORMATS, export_querysets, stream_export
+from .idempotency import idempotent
+from . import batch, dispatch, eta, heatmap, rider_stats, routing, sync, transitions
+from .models import (
+    ArchivedOrder, JobRun, Product, Category, Order, OrderEvent, OrderStatusCounter, RiderStats, User,
+    VendorDailySales, VendorProfile
+)
+from .push import notify_new_order
+from .routers import replica_reads
+from .utils import grid_cell, nearby_vendors, valid_coordinates, zone_for
 from .serializers import (
     RegisterCustomerSerializer,
     RegisterVendorSerializer,
@@ -20,7 +37,9 @@ from .serializers import (
     CustomTokenObtainPairSerializer,
     ProductSerializer,
     CategorySerializer,
-    OrderSerializer
+    OrderSerializer,
+    ArchivedOrderSerializer,
+    sparse_queryset
 )
 
 
@@ -62,6 +81,32 @@ def user_profile(request):
     })
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch_requests(request):
+    """
+    Run several GET requests in one round trip, e.g. on app open:
+    {"requests": [{"id": "me", "path": "/api/auth/user/"}, ...], "parallel": true}
+    """
+    specs = request.data.get('requests')
+    if not isinstance(specs, list) or not specs:
+        return Response({"error": "requests must be a non-empty list"}, status=400)
+    if len(specs) > settings.BATCH_MAX_REQUESTS:
+        return Response({"error": f"at most {settings.BATCH_MAX_REQUESTS} requests per batch"}, status=400)
+    if not all(isinstance(spec, dict) and isinstance(spec.get('path'), str) for spec in specs):
+        return Response({"error": "each request needs a path"}, status=400)
+
+    results = batch.run_batch(
+        request, [spec['path'] for spec in specs], parallel=bool(request.data.get('parallel'))
+    )
+    return Response({
+        'responses': [
+            {'id': spec.get('id', index), 'status': code, 'body': body}
+            for index, (spec, (code, body)) in enumerate(zip(specs, results))
+        ]
+    })
+
+
 # ======================
 # PERMISSIONS
 # ======================
@@ -71,16 +116,33 @@ class IsVendor(BasePermission):
         return request.user.is_authenticated and request.user.user_type == 'vendor'
 
 
+class SparseQuerysetMixin:
+    """Load only the columns behind ?fields= (see SparseFieldsMixin), plus sparse_always."""
+    sparse_always = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return sparse_queryset(queryset, self.get_serializer_class(), self.request, self.sparse_always)
+
+
+class ReplicaReadMixin:
+    """Serve list reads from the read replica (falls back to primary when it lags)."""
+
+    def list(self, request, *args, **kwargs):
+        with replica_reads():
+            return super().list(request, *args, **kwargs)
+
+
 # ======================
 # PRODUCTS & CATEGORIES
 # ======================
 
-class ProductListView(generics.ListAPIView):
+class ProductListView(SparseQuerysetMixin, ReplicaReadMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
 
     def get_queryset(self):
-        queryset = Product.objects.filter(is_available=True)
+        queryset = Product.objects.filter(is_available=True).select_related('vendor__vendor_profile')
         category = self.request.query_params.get('category')
         if category:
             queryset = queryset.filter(category__slug=category)
@@ -90,7 +152,7 @@ class ProductListView(generics.ListAPIView):
         return {'request': self.request}
 
 
-class ProductDetailView(generics.RetrieveAPIView):
+class ProductDetailView(SparseQuerysetMixin, generics.RetrieveAPIView):
     queryset = Product.objects.filter(is_available=True)
     serializer_class = ProductSerializer
     lookup_field = 'pk'
@@ -99,6 +161,45 @@ class ProductDetailView(generics.RetrieveAPIView):
         return {'request': self.request}
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def products_near_me(request):
+    """
+    Available products from the vendors closest to ?lat=&lng= (default: the
+    caller's saved location), nearest vendor first, within ?radius_km=.
+    """
+    params = request.query_params
+    try:
+        lat = float(params['lat']) if 'lat' in params else request.user.latitude
+        lng = float(params['lng']) if 'lng' in params else request.user.longitude
+        radius_km = min(float(params.get('radius_km', settings.NEARBY_RADIUS_KM)), settings.NEARBY_MAX_RADIUS_KM)
+        limit = min(max(int(params.get('limit', 50)), 1), 100)
+    except (AttributeError, TypeError, ValueError):
+        lat = None
+    if lat is None or lng is None or not (-90 <= lat <= 90 and -180 <= lng <= 180) or radius_km <= 0:
+        return Response({"error": "lat and lng are required (or save your location first)"}, status=400)
+
+    vendors = nearby_vendors(lat, lng, radius_km, settings.NEARBY_VENDOR_LIMIT)
+    distances = {vendor_id: distance for distance, vendor_id in vendors}
+    # Rank on (id, vendor) pairs first so only the page is loaded and serialized.
+    ranked = sorted(
+        Product.objects.filter(vendor_id__in=distances, is_available=True).values_list('id', 'vendor_id'),
+        key=lambda pair: (distances[pair[1]], pair[0])
+    )[:limit]
+    products = sparse_queryset(
+        Product.objects.filter(id__in=[product_id for product_id, _ in ranked])
+        .select_related('vendor__vendor_profile'),
+        ProductSerializer, request
+    ).in_bulk()
+    products = [products[product_id] for product_id, _ in ranked if product_id in products]
+
+    rows = ProductSerializer(products, many=True, context={'request': request}).data
+    vendor_of = dict(ranked)
+    for row, product in zip(rows, products):
+        row['distance_km'] = round(distances[vendor_of[product.id]], 2)
+    return Response(rows)
+
+
 class VendorProductListView(generics.ListCreateAPIView):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated, IsVendor]
@@ -125,16 +226,103 @@ class VendorProductListView(generics.ListCreateAPIView):
         serializer.save(vendor=self.request.user, image=image_url)
 
 
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(SparseQuerysetMixin, ReplicaReadMixin, generics.ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def catalog_changes(request):
+    """
+    Products and categories changed or deleted since ?since=<cursor>; omit the
+    cursor for a full snapshot. Read from the primary: a lagging replica would
+    hand out a cursor past changes it has not seen yet.
+    """
+    since = request.query_params.get('since')
+    if since:
+        try:
+            since = sync.decode_cursor(since)
+        except (ValueError, OverflowError):
+            return Response({"error": "since must be a cursor returned by this endpoint"}, status=400)
+
+    delta = sync.changes(since or None)
+    context = {'request': request}
+    return Response({
+        'cursor': delta['cursor'],
+        'full': delta['full'],
+        'products': ProductSerializer(delta['products'], many=True, context=context).data,
+        'categories': CategorySerializer(delta['categories'], many=True, context=context).data,
+        'deleted': delta['deleted'],
+    })
+
+
+# ======================
+# VENDOR DASHBOARD
+# ======================
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsVendor])
+def update_vendor_location(request):
+    """Pin the shop on the map so it shows up in products/nearby/."""
+    try:
+        lat = float(request.data.get('latitude'))
+        lng = float(request.data.get('longitude'))
+    except (TypeError, ValueError):
+        return Response({"error": "latitude and longitude are required"}, status=400)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return Response({"error": "Invalid coordinates"}, status=400)
+
+    profile = get_object_or_404(VendorProfile, user=request.user)
+    profile.latitude, profile.longitude = lat, lng
+    profile.save(update_fields=['latitude', 'longitude'])
+    return Response({"status": "Location updated"})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsVendor])
+def vendor_dashboard(request):
+    """Daily sales, totals and top products for the last ?days= days, read from the rollups only."""
+    try:
+        days = min(max(int(request.query_params.get('days', 30)), 1), 366)
+    except ValueError:
+        return Response({"error": "days must be a number"}, status=400)
+    since = timezone.localdate() - timedelta(days=days - 1)
+    rollups = VendorDailySales.objects.filter(vendor=request.user, day__gte=since)
+
+    daily = list(
+        rollups.values('day').annotate(
+            orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue')
+        ).order_by('day')
+    )
+    top_products = list(
+        rollups.values('product_id').annotate(
+            name=Max('product_name'), orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue')
+        ).order_by('-revenue')[:5]
+    )
+    return Response({
+        'since': since,
+        'totals': rollups.aggregate(orders=Sum('orders'), units=Sum('units'), revenue=Sum('revenue')),
+        'daily': daily,
+        'top_products': [
+            {
+                'product': row['product_id'],
+                'name': row['name'],
+                'orders': row['orders'],
+                'units': row['units'],
+                'revenue': row['revenue'],
+            }
+            for row in top_products
+        ],
+    })
+
+
 # ======================
 # ORDERS (Customer)
 # ======================
 
+@method_decorator(idempotent, name='post')
 class OrderCreateView(generics.CreateAPIView):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
@@ -145,44 +333,103 @@ class OrderCreateView(generics.CreateAPIView):
         product = serializer.validated_data['product']
         quantity = serializer.validated_data['quantity']
         total = product.price * quantity
-        order = serializer.save(
-            customer=self.request.user,
-            total_price=total,
-            status='pending'
-        )
-
-        try:
-            tokens = BodabodaDevice.objects.filter(
-                is_active=True,
-                user__bodaboda_profile__verified=True
-            ).values_list('expo_token', flat=True)
-
-            valid_tokens = [token for token in tokens if PushClient.is_exponent_push_token(token)]
-            
-            if valid_tokens:
-                client = PushClient()
-                messages = [
-                    PushMessage(
-                        to=token,
-                        title="New Order Available!",
-                        body=f"{product.name} • TZS {total:,}",
-                        data={"order_id": order.id},
-                        sound="default"
-                    )
-                    for token in valid_tokens
-                ]
-                client.publish_multiple(messages)
-        except Exception as e:
-            print("Push notification error:", e)
-
-
-class CustomerOrderListView(generics.ListAPIView):
+        with transaction.atomic():
+            order = serializer.save(
+                customer=self.request.user,
+                total_price=total,
+                status='pending',
+                zone=zone_for(self.request.user.latitude, self.request.user.longitude),
+                **Order.snapshot(product, self.request.user)
+            )
+            transitions.order_created(order, actor=self.request.user)
+        notify_new_order(order)
+
+
+class CustomerOrderListView(SparseQuerysetMixin, ReplicaReadMixin, generics.ListAPIView):
+    """The customer's live orders merged with their archived ones, newest first."""
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    # The merge below orders on these, so ?fields= must not defer them.
+    sparse_always = ('created_at',)
 
     def get_queryset(self):
         return Order.objects.filter(customer=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        with replica_reads():
+            live = list(self.filter_queryset(self.get_queryset()).order_by('-created_at', '-id'))
+            archived = list(sparse_queryset(
+                ArchivedOrder.objects.filter(customer=request.user), ArchivedOrderSerializer, request,
+                self.sparse_always
+            ).order_by('-created_at', '-id'))
+            live_data = self.get_serializer(live, many=True).data
+            archived_data = ArchivedOrderSerializer(archived, many=True, context=self.get_serializer_context()).data
+        merged = heapq.merge(
+            zip(live, live_data), zip(archived, archived_data),
+            key=lambda pair: (pair[0].created_at, pair[0].id), reverse=True
+        )
+        return Response([data for _, data in merged])
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def order_eta(request, order_id):
+    """When the rider should reach the customer, for the customer or the rider of an in-flight order."""
+    order = get_object_or_404(
+        Order.objects.select_related('claimed_by').only(
+            'id', 'status', 'zone', 'customer_id', 'vendor_id', 'customer_latitude', 'customer_longitude',
+            'claimed_by', 'claimed_by__latitude', 'claimed_by__longitude'
+        ),
+        id=order_id
+    )
+    if request.user.id not in (order.customer_id, order.claimed_by_id):
+        return Response({"error": "Not your order"}, status=404)
+    if order.status not in ('assigned', 'picked_up') or order.claimed_by is None:
+        return Response({"error": "Order is not on its way"}, status=409)
+
+    rider = order.claimed_by
+    shop = eta.shop_location(order.vendor_id) if order.status == 'assigned' else None
+    now = timezone.now()
+    estimate = eta.estimate(order, (rider.latitude, rider.longitude), shop=shop, now=now)
+    if estimate is None:
+        return Response({"error": "Rider or customer location unknown"}, status=409)
+    return Response({
+        "order": order.id,
+        "status": order.status,
+        "eta_seconds": estimate['seconds'],
+        "eta_at": now + timedelta(seconds=estimate['seconds']),
+        "distance_km": estimate['distance_km'],
+        "speed_kmh": estimate['speed_kmh'],
+        "source": estimate['source'],
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def rate_delivery(request, order_id):
+    """Customer rates the rider (1-5) once the order has been delivered."""
+    try:
+        rating = int(request.data.get('rating'))
+    except (TypeError, ValueError):
+        rating = 0
+    if not 1 <= rating <= 5:
+        return Response({"error": "rating must be between 1 and 5"}, status=400)
+
+    with transaction.atomic():
+        # Conditional update so a double-submitted rating is only counted once.
+        rated = Order.objects.filter(
+            id=order_id, customer=request.user, status='delivered', bodaboda_rating=0
+        ).update(bodaboda_rating=rating)
+        if not rated:
+            order = get_object_or_404(Order, id=order_id, customer=request.user)
+            if order.status != 'delivered':
+                return Response({"error": "Only delivered orders can be rated"}, status=400)
+            return Response({"error": "Order already rated"}, status=409)
+        rider_stats.record_rating(
+            Order.objects.values_list('claimed_by_id', flat=True).get(id=order_id), rating
+        )
+    return Response({"status": "Thanks for rating your rider"}, status=200)
+
 
 # ======================
 # BODABODA ORDERS & ACTIONS
@@ -193,10 +440,15 @@ class CustomerOrderListView(generics.ListAPIView):
 def nearby_orders(request):
     if request.user.user_type != 'bodaboda':
         return Response({"error": "Only bodabodas"}, status=403)
-    orders = Order.objects.filter(
+    partition = request.user.dispatch_partition
+    routed = dispatch.route_to_owner(request, partition)
+    if routed is not None:
+        return routed
+    orders = sparse_queryset(Order.objects.filter(
+        dispatch_partition=partition,
         status='pending',
         claimed_by__isnull=True
-    ).select_related('customer', 'product')
+    ), OrderSerializer, request)
     serializer = OrderSerializer(orders, many=True, context={'request': request})
     return Response(serializer.data)
 
@@ -206,44 +458,145 @@ def nearby_orders(request):
 def my_claimed_orders(request):
     if request.user.user_type != 'bodaboda':
         return Response({"error": "Only bodabodas"}, status=403)
-    orders = Order.objects.filter(claimed_by=request.user).exclude(status='delivered')
+    orders = sparse_queryset(
+        Order.objects.filter(claimed_by=request.user).exclude(status='delivered'), OrderSerializer, request
+    )
     return Response(OrderSerializer(orders, many=True, context={'request': request}).data)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def plan_delivery_route(request):
+    """
+    Visiting order for the rider's in-flight orders, starting from ?lat=&lng=
+    (default: the rider's saved location). Orders still waiting for pickup get
+    a pickup stop at the vendor before their drop-off at the customer.
+    """
+    if request.user.user_type != 'bodaboda':
+        return Response({"error": "Only bodabodas"}, status=403)
+    params = request.query_params
+    try:
+        lat = float(params['lat']) if 'lat' in params else request.user.latitude
+        lng = float(params['lng']) if 'lng' in params else request.user.longitude
+    except (TypeError, ValueError):
+        lat = None
+    if lat is None or lng is None or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return Response({"error": "lat and lng are required (or update your location first)"}, status=400)
+
+    orders = list(
+        Order.objects.filter(claimed_by=request.user, status__in=['assigned', 'picked_up'])
+        .order_by('claimed_at', 'id')
+        .values_list('id', 'status', 'vendor_id', 'customer_latitude', 'customer_longitude')
+        [:settings.ROUTE_MAX_ORDERS]
+    )
+    shops = {
+        user_id: (vendor_lat, vendor_lng)
+        for user_id, vendor_lat, vendor_lng in VendorProfile.objects.filter(
+            user_id__in={row[2] for row in orders}, latitude__isnull=False
+        ).values_list('user_id', 'latitude', 'longitude')
+    }
+
+    stops, unrouted = [], []
+    for order_id, order_status, vendor_id, customer_lat, customer_lng in orders:
+        needs_pickup = order_status == 'assigned'
+        if customer_lat is None or customer_lng is None or (needs_pickup and vendor_id not in shops):
+            unrouted.append(order_id)
+            continue
+        if needs_pickup:
+            stops.append(routing.Stop(order_id, 'pickup', *shops[vendor_id]))
+        stops.append(routing.Stop(order_id, 'dropoff', customer_lat, customer_lng))
+
+    route, legs, total_km, converged = routing.plan_route((lat, lng), stops, settings.ROUTE_PLAN_BUDGET_MS)
+    return Response({
+        "stops": [
+            {"order": stop.order_id, "kind": stop.kind, "latitude": stop.latitude,
+             "longitude": stop.longitude, "leg_km": round(leg, 3)}
+            for stop, leg in zip(route, legs)
+        ],
+        "total_km": round(total_km, 3),
+        "converged": converged,
+        "unrouted": unrouted,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def demand_heatmap(request):
+    """
+    Recent order demand inside ?min_lat=&min_lng=&max_lat=&max_lng=, as a flat
+    array of [row offset, col offset, score, ...] triples from "origin". Cell
+    (row, col) spans latitudes row * cell_degrees to (row + 1) * cell_degrees,
+    and likewise for longitudes. Scores are decayed order counts.
+    """
+    if request.user.user_type != 'bodaboda':
+        return Response({"error": "Only bodabodas"}, status=403)
+    try:
+        box = [float(request.query_params[name]) for name in ('min_lat', 'min_lng', 'max_lat', 'max_lng')]
+    except (KeyError, ValueError):
+        box = None
+    in_range = box is not None and all(-90 <= lat <= 90 for lat in box[0::2]) and all(
+        -180 <= lng <= 180 for lng in box[1::2]
+    )
+    if not in_range:
+        return Response({"error": "min_lat, min_lng, max_lat and max_lng are required"}, status=400)
+    min_row, min_col = grid_cell(box[0], box[1])
+    max_row, max_col = grid_cell(box[2], box[3])
+    if min_row > max_row or min_col > max_col:
+        return Response({"error": "min corner must be south-west of max corner"}, status=400)
+    if (max_row - min_row + 1) * (max_col - min_col + 1) > settings.DEMAND_MAX_VIEWPORT_CELLS:
+        return Response({"error": "Viewport too large; zoom in"}, status=400)
+
+    with replica_reads():
+        cells = heatmap.viewport(min_row, max_row, min_col, max_col)
+    flat = []
+    for row, col, score in cells:
+        flat += [row - min_row, col - min_col, round(score, 2)]
+    return Response({
+        "cell_degrees": settings.ZONE_CELL_DEGREES,
+        "origin": [min_row, min_col],
+        "cells": flat,
+    })
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def claim_order(request, order_id):
     if request.user.user_type != 'bodaboda':
         return Response({"error": "Only bodabodas can claim orders"}, status=403)
-    
-    with transaction.atomic():
-        order = get_object_or_404(Order, id=order_id, status='pending')
-        if order.claimed_by is not None:
-            return Response({"error": "Order already claimed"}, status=409)
-        
-        order.claimed_by = request.user
-        order.claimed_at = timezone.now()
-        order.status = 'assigned'
-        order.save()
-    
+    partition = Order.objects.filter(id=order_id).values_list('dispatch_partition', flat=True).first()
+    if partition is None:
+        return Response({"detail": "No Order matches the given query."}, status=404)
+    routed = dispatch.route_to_owner(request, partition)
+    if routed is not None:
+        return routed
+
+    if not transitions.claim(order_id, request.user):
+        return Response({"error": "Order already claimed"}, status=409)
     return Response({"status": "Order claimed successfully"}, status=200)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def complete_delivery(request, order_id):
-    order = get_object_or_404(Order, id=order_id, claimed_by=request.user)
-    order.status = 'delivered'
-    order.is_delivered = True
-    order.delivered_at = timezone.now()
-    
-    # Increase bodaboda rating
-    from django.db.models import F
-    profile = request.user.bodaboda_profile
-    profile.rating = F('rating') + 1
-    profile.save(update_fields=['rating'])
-    
-    order.save()
+    with transaction.atomic():
+        order = get_object_or_404(Order, id=order_id, claimed_by=request.user)
+        if order.status == 'delivered':
+            # Already completed (e.g. a retried request); don't count it twice.
+            return Response({"status": "Delivery completed"}, status=200)
+        previous_status = order.status
+        order.status = 'delivered'
+        order.is_delivered = True
+        order.delivered_at = timezone.now()
+
+        # Increase bodaboda rating
+        from django.db.models import F
+        profile = request.user.bodaboda_profile
+        profile.rating = F('rating') + 1
+        profile.save(update_fields=['rating'])
+
+        order.save()
+        transitions.order_delivered(order, previous_status, actor=request.user)
     return Response({"status": "Delivery completed"}, status=200)
 
 
@@ -257,6 +610,48 @@ def get_customer_phone(request, order_id):
     return Response({"phone": order.customer.phone})
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def rider_leaderboard(request):
+    """Top riders by ?by=deliveries|rating|on_time|speed, read straight off the indexed RiderStats columns."""
+    orderings = {
+        'deliveries': ('-deliveries',),
+        'rating': ('-average_rating', '-rating_count'),
+        'on_time': ('-on_time_rate', '-deliveries'),
+        'speed': ('average_delivery_minutes',),
+    }
+    by = request.query_params.get('by', 'deliveries')
+    if by not in orderings:
+        return Response({"error": f"by must be one of: {', '.join(orderings)}"}, status=400)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+    except ValueError:
+        return Response({"error": "limit must be a number"}, status=400)
+
+    stats = RiderStats.objects.select_related('rider__bodaboda_profile').order_by(*orderings[by], 'rider_id')
+    if by != 'deliveries':
+        stats = stats.filter(deliveries__gte=settings.LEADERBOARD_MIN_DELIVERIES)
+    if by == 'rating':
+        stats = stats.filter(rating_count__gt=0)
+
+    return Response([
+        {
+            'rank': rank,
+            'rider': row.rider_id,
+            'username': row.rider.username,
+            'plate_number': getattr(getattr(row.rider, 'bodaboda_profile', None), 'plate_number', None),
+            'deliveries': row.deliveries,
+            'average_rating': round(row.average_rating, 2) if row.rating_count else None,
+            'rating_count': row.rating_count,
+            'average_delivery_minutes': (
+                round(row.average_delivery_minutes, 1) if row.average_delivery_minutes is not None else None
+            ),
+            'on_time_percent': round(row.on_time_rate * 100, 1),
+        }
+        for rank, row in enumerate(stats[:limit], start=1)
+    ])
+
+
 # ======================
 # LOCATION
 # ======================
@@ -280,16 +675,20 @@ def update_location(request):
         )
     
     try:
-        request.user.latitude = float(lat)
-        request.user.longitude = float(lng)
-        request.user.save(update_fields=['latitude', 'longitude'])
-        return Response({"status": "Location updated"}, status=status.HTTP_200_OK)
+        lat, lng = float(lat), float(lng)
     except (ValueError, TypeError):
+        lat = lng = None
+    if lat is None or not valid_coordinates(lat, lng):
         return Response(
             {"error": "Invalid coordinates"},
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    request.user.latitude, request.user.longitude = lat, lng
+    request.user.zone, request.user.dispatch_partition = dispatch.locate(lat, lng)
+    request.user.save(update_fields=['latitude', 'longitude', 'zone', 'dispatch_partition'])
+    return Response({"status": "Location updated"}, status=status.HTTP_200_OK)
+
 
 # core/views.py
 @api_view(['GET'])
@@ -324,4 +723,83 @@ def save_device_token(request):
         expo_token=token,
         defaults={'user': request.user, 'is_active': True}
     )
-    return Response({"status": "Token saved"})
\ No newline at end of file
+    return Response({"status": "Token saved"})
+
+
+# ======================
+# OPS
+# ======================
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def performance_report(request):
+    """Per-endpoint latency, DB and serializer percentiles (ms) for this worker process."""
+    if request.method == 'DELETE':
+        metrics.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(metrics.snapshot())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def job_runs(request):
+    """The most recent background job runs (optionally ?job=), newest first."""
+    runs = JobRun.objects.order_by('-started_at')
+    if request.query_params.get('job'):
+        runs = runs.filter(job=request.query_params['job'])
+    return Response([
+        {'job': run.job, 'started_at': run.started_at, 'duration_ms': round(run.duration_ms, 1), **run.stats}
+        for run in runs[:50]
+    ])
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def order_counters(request):
+    """Live order counts per status (and per zone), plus today's claim latency from the event log."""
+    counters = OrderStatusCounter.objects.filter(count__gt=0)
+    if request.query_params.get('zone') is not None:
+        counters = counters.filter(zone=request.query_params['zone'])
+
+    statuses, zones = {}, {}
+    for counter in counters:
+        statuses[counter.status] = statuses.get(counter.status, 0) + counter.count
+        zones.setdefault(counter.zone, {})[counter.status] = counter.count
+
+    midnight = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    claims = OrderEvent.objects.filter(kind='claimed', created_at__gte=midnight).aggregate(
+        count=Count('id'), mean_seconds=Avg('elapsed_seconds'), max_seconds=Max('elapsed_seconds')
+    )
+    return Response({'statuses': statuses, 'zones': zones, 'claims_today': claims})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_orders(request):
+    """Stream orders as CSV or JSON lines, filtered by ?from=, ?to= (inclusive days) and ?status=."""
+    export_format = request.query_params.get('type', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return Response({"error": f"type must be one of {', '.join(EXPORT_FORMATS)}"}, status=400)
+
+    days = {}
+    for param in ('from', 'to'):
+        value = request.query_params.get(param)
+        try:
+            days[param] = parse_date(value) if value else None
+        except ValueError:  # well-formed but impossible, like 2025-02-30
+            days[param] = None
+        if value and days[param] is None:
+            return Response({"error": f"{param} must be a date like 2025-10-31"}, status=400)
+
+    valid_statuses = {choice for choice, _ in Order.STATUS_CHOICES}
+    statuses = [value for value in request.query_params.getlist('status') if value]
+    if any(value not in valid_statuses for value in statuses):
+        return Response({"error": f"status must be one of {', '.join(sorted(valid_statuses))}"}, status=400)
+
+    querysets = export_querysets(days['from'], days['to'], statuses)
+    response = StreamingHttpResponse(
+        stream_export(querysets, export_format),
+        content_type='text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    )
+    response['Content-Disposition'] = f'attachment; filename="orders.{export_format}"'
+    return response
@@ -49,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,8 +58,16 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.profiling.ProfilingMiddleware',
 ]
 
+# Live request profiling: staff can send `X-Profile: 1` to profile a single
+# request; a non-zero sample rate profiles that fraction of all requests.
+# Samples are browsable in the admin under Profile samples.
+PROFILING_SAMPLE_RATE = float(os.environ.get('TUUZIANE_PROFILE_SAMPLE_RATE', '0'))
+PROFILING_TOP_N = 25
+PROFILING_RING_SIZE = 50
+
 
 
 
@@ -71,6 +81,111 @@ cloudinary.config(
     api_secret=CLOUDINARY_API_SECRET
 )
 
+# Expo push fan-out to riders. Switch off for load tests so synthetic orders
+# don't notify real devices.
+PUSH_NOTIFICATIONS_ENABLED = os.environ.get('TUUZIANE_PUSH_ENABLED', '1') == '1'
+
+# Rider leaderboard: a delivery is on time when claim-to-delivery stays within
+# this many minutes; riders need a few deliveries before they are ranked.
+DELIVERY_ON_TIME_MINUTES = 45
+LEADERBOARD_MIN_DELIVERIES = 5
+
+# Orders are bucketed into square grid cells of this many degrees (~1.1 km)
+# for the live status counters.
+ZONE_CELL_DEGREES = 0.01
+
+# archive_orders moves delivered/cancelled orders older than this out of the
+# live Order table.
+ORDER_ARCHIVE_AFTER_DAYS = 30
+
+# Catalog delta sync (sync/changes/). Tombstones older than the retention
+# window are pruned; clients whose cursor is older get a full snapshot.
+SYNC_CURSOR_OVERLAP_SECONDS = 5
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# batch/ multiplexes up to this many GET sub-requests per call; with
+# "parallel": true they run on a shared pool of this many threads.
+BATCH_MAX_REQUESTS = 10
+BATCH_MAX_WORKERS = 4
+
+# Response compression for API payloads (core.middleware.CompressionMiddleware).
+# Brotli is used when the optional `brotli` package is installed. Low levels
+# keep CPU per request small; bodies under the threshold aren't worth it.
+COMPRESSION_MIN_BYTES = 1024
+COMPRESSION_GZIP_LEVEL = 5
+COMPRESSION_BROTLI_QUALITY = 4
+
+# products/nearby/: search radius (default and cap) and how many vendors to
+# rank. The scan limit bounds the rows read in very dense areas.
+NEARBY_RADIUS_KM = 5
+NEARBY_MAX_RADIUS_KM = 20
+NEARBY_VENDOR_LIMIT = 30
+NEARBY_VENDOR_SCAN_LIMIT = 2000
+
+# bodaboda/route/: the 2-opt pass stops improving the route after this many
+# milliseconds; only the oldest ROUTE_MAX_ORDERS in-flight orders are planned.
+ROUTE_PLAN_BUDGET_MS = 50
+ROUTE_MAX_ORDERS = 12
+
+# Demand heatmap (bodaboda/heatmap/): order counts per grid cell halve every
+# DEMAND_HALF_LIFE_MINUTES; fainter cells are left out of responses.
+DEMAND_HALF_LIFE_MINUTES = 60
+DEMAND_MIN_SCORE = 0.05
+DEMAND_MAX_VIEWPORT_CELLS = 2500
+
+# Order ETAs (orders/<id>/eta/). Straight-line distance times ETA_ROUTE_FACTOR
+# approximates the road route; estimates are shared per ETA_CELL_DEGREES cell
+# (~220 m) for ETA_CACHE_SECONDS. Speed profiles need ETA_MIN_SAMPLES
+# deliveries before they replace the default, and deliveries outside the
+# sample window (claim to delivery) are not learned from.
+ETA_ROUTE_FACTOR = 1.3
+ETA_CELL_DEGREES = 0.002
+ETA_CACHE_SECONDS = 60
+ETA_DEFAULT_SPEED_KMH = 18
+ETA_MIN_SAMPLES = 5
+ETA_MIN_SAMPLE_SECONDS = 60
+ETA_MAX_SAMPLE_SECONDS = 3 * 3600
+
+# Zone-partitioned dispatch (core.dispatch). Partition i is served by
+# TUUZIANE_DISPATCH_NODES[i] (comma-separated base URLs); this process serves
+# TUUZIANE_DISPATCH_PARTITION. Zones are grouped in blocks of
+# DISPATCH_BLOCK_CELLS x DISPATCH_BLOCK_CELLS grid cells before hashing.
+# Run `repartition_dispatch` after changing either. Requests for another
+# node's partition get a 307 there; with TUUZIANE_DISPATCH_FORWARD=1 this node
+# proxies them instead (clients drop Authorization on cross-host redirects).
+DISPATCH_NODES = [url for url in os.environ.get('TUUZIANE_DISPATCH_NODES', '').split(',') if url]
+DISPATCH_PARTITION = int(os.environ.get('TUUZIANE_DISPATCH_PARTITION', '0'))
+DISPATCH_BLOCK_CELLS = 4
+DISPATCH_FORWARD = os.environ.get('TUUZIANE_DISPATCH_FORWARD', '0') == '1'
+DISPATCH_FORWARD_TIMEOUT = 5
+
+# expire_stale_claims: claims not picked up within CLAIM_EXPIRY_MINUTES go back
+# to pending; riders carrying RIDER_MAX_ACTIVE_ORDERS in-flight orders are
+# marked unavailable. Each background job keeps its last JOB_RUN_RING_SIZE runs.
+CLAIM_EXPIRY_MINUTES = 30
+RIDER_MAX_ACTIVE_ORDERS = 3
+JOB_RUN_RING_SIZE = 200
+
+# Idempotency-Key on order creation and claims: a stored response is replayed
+# for IDEMPOTENCY_TTL_SECONDS; a key whose first request is still running is
+# held for at most IDEMPOTENCY_LOCK_SECONDS. purge_idempotency_keys clears
+# expired keys.
+IDEMPOTENCY_TTL_SECONDS = 24 * 3600
+IDEMPOTENCY_LOCK_SECONDS = 60
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Per-process LRU: least recently used estimates are culled past MAX_ENTRIES.
+    'eta': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'eta',
+        'TIMEOUT': ETA_CACHE_SECONDS,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+
 ROOT_URLCONF = 'tuuziane.urls'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -109,13 +224,68 @@ REST_FRAMEWORK = {
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# SQLite tuning profiles. Pick one with TUUZIANE_DB_PROFILE; 'production'
+# switches to WAL so rider location writes and order claims stop locking out
+# readers, waits on busy locks instead of failing, and keeps connections open.
+SQLITE_PROFILES = {
     'default': {
+        'pragmas': {},
+        'options': {},
+        'conn_max_age': 0,
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+            'mmap_size': 134217728,
+            'cache_size': -20000,
+            'temp_store': 'MEMORY',
+        },
+        'options': {
+            'timeout': 5,
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'conn_max_age': 600,
+    },
+}
+
+DATABASE_PROFILE = os.environ.get('TUUZIANE_DB_PROFILE', 'default')
+
+
+def sqlite_database(name, profile=DATABASE_PROFILE):
+    config = SQLITE_PROFILES[profile]
+    options = dict(config['options'])
+    if config['pragmas']:
+        options['init_command'] = ';'.join(
+            f'PRAGMA {pragma}={value}' for pragma, value in config['pragmas'].items()
+        )
+    return {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': name,
+        'OPTIONS': options,
+        'CONN_MAX_AGE': config['conn_max_age'],
+        'CONN_HEALTH_CHECKS': config['conn_max_age'] > 0,
     }
+
+
+DATABASES = {
+    'default': sqlite_database(BASE_DIR / 'db.sqlite3'),
 }
 
+# Optional read replica: a second SQLite file kept in sync with `sync_replica`.
+# Catalog, order-history and admin changelist reads go there while its
+# heartbeat is at most REPLICA_MAX_LAG_SECONDS behind; otherwise they fall
+# back to the primary.
+REPLICA_DATABASE = os.environ.get('TUUZIANE_REPLICA_DB')
+if REPLICA_DATABASE:
+    DATABASES['replica'] = sqlite_database(REPLICA_DATABASE)
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+REPLICA_MAX_LAG_SECONDS = 30
+REPLICA_LAG_CHECK_INTERVAL = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators